@@ -1,6 +1,6 @@
 {
     'name': 'Book Data',
-    'version': '1.10.1',
+    'version': '1.20.7',
     'category': 'Retail',
     'summary': 'Fetch book metadata from external APIs (Hardcover, Titlepage)',
     'description': """
@@ -13,6 +13,12 @@ Populates description, author, image, publication date, and AU/NZ pricing on pro
     'data': [
         'security/ir.model.access.csv',
         'data/ir_model_fields.xml',
+        'data/ir_cron.xml',
+        'data/ir_actions_server.xml',
+        'views/book_data_enrichment_views.xml',
+        'views/book_data_onix_import_views.xml',
+        'views/book_data_supplier_alias_views.xml',
+        'wizard/onix_import_wizard_views.xml',
         'views/product_template_views.xml',
         'views/res_config_settings_views.xml',
     ],
@@ -1,2 +1,8 @@
 from . import res_config_settings
+from . import res_partner
+from . import book_data_cache
+from . import book_data_cover
+from . import book_data_enrichment
+from . import book_data_onix_import
+from . import book_data_supplier_alias
 from . import product_template
@@ -0,0 +1,135 @@
+import json
+import logging
+import xml.etree.ElementTree as ET
+from datetime import timedelta
+
+from odoo import api, fields, models
+
+_logger = logging.getLogger(__name__)
+
+# Default time-to-live in days, overridable through system parameters
+CACHE_TTL_DEFAULTS = {
+    'hardcover': 30,
+    'titlepage': 7,
+    'negative': 1,
+}
+
+
+class BookDataCache(models.Model):
+    _name = 'book.data.cache'
+    _description = 'Book Data Provider Cache'
+    _rec_name = 'isbn'
+    _order = 'fetch_date desc'
+
+    isbn = fields.Char(string='ISBN-13', required=True, readonly=True)
+    provider = fields.Selection([
+        ('hardcover', 'Hardcover'),
+        ('titlepage', 'Titlepage'),
+    ], string='Provider', required=True, readonly=True)
+    payload = fields.Text(
+        string='Payload', readonly=True,
+        help="Raw Hardcover edition JSON or Titlepage ONIX Product XML. Empty when the provider had no record.",
+    )
+    found = fields.Boolean(string='Found', readonly=True)
+    fetch_date = fields.Datetime(string='Fetched On', required=True, readonly=True, index=True)
+
+    _sql_constraints = [
+        ('isbn_provider_uniq', 'unique(isbn, provider)', 'Only one cache entry per ISBN and provider is allowed.'),
+    ]
+
+    @api.model
+    def _get_ttl(self, provider, found=True):
+        """Return the time-to-live of a cache entry as a timedelta."""
+        key = provider if found else 'negative'
+        days = self.env['ir.config_parameter'].sudo().get_param(
+            f'book_data.cache_ttl_{key}', CACHE_TTL_DEFAULTS[key],
+        )
+        return timedelta(days=int(days))
+
+    @api.model
+    def _get(self, isbn, provider):
+        """Look up a fresh cache entry.
+
+        Returns ``(hit, data)``: ``hit`` is False when nothing usable is cached,
+        ``data`` is the decoded payload, or None for a cached "not found".
+        """
+        isbn = isbn.strip()
+        hits = self._get_many([isbn], provider)
+        return (True, hits[isbn]) if isbn in hits else (False, None)
+
+    @api.model
+    def _get_many(self, isbns, provider):
+        """Look up fresh cache entries for many ISBNs with one query.
+
+        Returns a dict mapping each cached ISBN to its decoded payload, or to
+        None for a cached "not found". Missing and stale ISBNs are left out.
+        """
+        now = fields.Datetime.now()
+        self.env.cr.execute("""
+            SELECT isbn, payload
+            FROM book_data_cache
+            WHERE isbn = ANY(%s) AND provider = %s
+              AND ((found AND fetch_date >= %s) OR (NOT found AND fetch_date >= %s))
+        """, (
+            list(isbns), provider,
+            now - self._get_ttl(provider), now - self._get_ttl(provider, found=False),
+        ))
+        hits = {}
+        for isbn, payload in self.env.cr.fetchall():
+            if payload is None:
+                hits[isbn] = None
+                continue
+            try:
+                hits[isbn] = self._decode(provider, payload)
+            except (ValueError, ET.ParseError):
+                _logger.warning("Discarding corrupt %s cache entry for ISBN %s", provider, isbn)
+        return hits
+
+    @api.model
+    def _put(self, isbn, provider, data):
+        """Store a provider response, or a negative entry when ``data`` is None."""
+        found = data is not None
+        # Upsert in SQL so concurrent scans of the same ISBN don't collide on the unique key
+        self.env.cr.execute("""
+            INSERT INTO book_data_cache (isbn, provider, payload, found, fetch_date,
+                                         create_uid, create_date, write_uid, write_date)
+            VALUES (%(isbn)s, %(provider)s, %(payload)s, %(found)s, %(now)s,
+                    %(uid)s, %(now)s, %(uid)s, %(now)s)
+            ON CONFLICT (isbn, provider) DO UPDATE
+            SET payload = EXCLUDED.payload,
+                found = EXCLUDED.found,
+                fetch_date = EXCLUDED.fetch_date,
+                write_uid = EXCLUDED.write_uid,
+                write_date = EXCLUDED.write_date
+        """, {
+            'isbn': isbn.strip(),
+            'provider': provider,
+            'payload': self._encode(provider, data) if found else None,
+            'found': found,
+            'now': fields.Datetime.now(),
+            'uid': self.env.uid,
+        })
+
+    @staticmethod
+    def _encode(provider, data):
+        if provider == 'hardcover':
+            return json.dumps(data)
+        return ET.tostring(data, encoding='unicode')
+
+    @staticmethod
+    def _decode(provider, payload):
+        if provider == 'hardcover':
+            return json.loads(payload)
+        return ET.fromstring(payload)
+
+    @api.model
+    def _cron_evict_stale(self):
+        """Scheduled action: delete cache entries past their time-to-live."""
+        now = fields.Datetime.now()
+        for provider in ('hardcover', 'titlepage'):
+            self.env.cr.execute("""
+                DELETE FROM book_data_cache
+                WHERE provider = %s
+                  AND ((found AND fetch_date < %s) OR (NOT found AND fetch_date < %s))
+            """, (provider, now - self._get_ttl(provider), now - self._get_ttl(provider, found=False)))
+            _logger.info("Book data cache: evicted %s stale %s entries", self.env.cr.rowcount, provider)
@@ -0,0 +1,149 @@
+import base64
+import hashlib
+import logging
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import requests
+
+from odoo import api, fields, models
+
+from odoo.addons.book_data.tools.provider_client import get_client
+
+_logger = logging.getLogger(__name__)
+
+# Covers downloaded (and committed) per chunk
+COVER_CHUNK_SIZE = 50
+COVER_WORKERS = 8
+# Seconds a single cron run may spend before handing over to the next run
+COVER_TIME_BUDGET = 240
+
+
+class BookDataCover(models.Model):
+    _name = 'book.data.cover'
+    _description = 'Book Cover Image'
+    _rec_name = 'url'
+    _order = 'id'
+
+    url = fields.Char(string='URL', required=True, readonly=True)
+    state = fields.Selection([
+        ('pending', 'Pending'),
+        ('done', 'Done'),
+        ('error', 'Error'),
+    ], string='Status', default='pending', required=True, readonly=True, index=True)
+    image = fields.Binary(string='Image', attachment=True, readonly=True)
+    checksum = fields.Char(string='Checksum', readonly=True, help="SHA-1 of the downloaded image.")
+    etag = fields.Char(string='ETag', readonly=True)
+    last_modified = fields.Char(string='Last Modified', readonly=True)
+    date_fetched = fields.Datetime(string='Fetched On', readonly=True)
+    error_message = fields.Text(string='Error', readonly=True)
+
+    _sql_constraints = [
+        ('url_uniq', 'unique(url)', 'Only one cover per URL is allowed.'),
+    ]
+
+    @api.model
+    def _enqueue(self, urls):
+        """Queue cover URLs for download. A URL shared by several editions is fetched once."""
+        now = fields.Datetime.now()
+        # Upsert in SQL so concurrent saves of the same cover don't collide on the unique key
+        self.env.cr.execute("""
+            INSERT INTO book_data_cover (url, state, create_uid, create_date, write_uid, write_date)
+            SELECT url, 'pending', %(uid)s, %(now)s, %(uid)s, %(now)s
+            FROM unnest(%(urls)s::varchar[]) AS url
+            ON CONFLICT (url) DO UPDATE
+            SET state = 'pending', write_uid = EXCLUDED.write_uid, write_date = EXCLUDED.write_date
+        """, {'urls': list(urls), 'uid': self.env.uid, 'now': now})
+        self.invalidate_model(['state'])
+        self.env.ref('book_data.ir_cron_book_data_cover_fetch')._trigger()
+
+    @api.model
+    def _cron_fetch(self):
+        """Scheduled action: download pending covers and set them on their products.
+
+        Downloads run in parallel and are conditional, so an unchanged cover
+        costs a 304 instead of the whole image. Image resizing happens here,
+        in the background, when the cover is written to the products.
+        """
+        start = time.monotonic()
+        done = 0
+        while time.monotonic() - start < COVER_TIME_BUDGET:
+            covers = self.search([('state', '=', 'pending')], limit=COVER_CHUNK_SIZE)
+            if not covers:
+                break
+            covers._fetch()
+            covers._apply()
+            done += len(covers)
+            self.env['ir.cron']._notify_progress(
+                done=done, remaining=self.search_count([('state', '=', 'pending')]),
+            )
+            self.env.cr.commit()
+        _logger.info("Book covers: processed %s covers in %.1fs", done, time.monotonic() - start)
+
+    def _fetch(self):
+        """Download a chunk of covers, skipping those unchanged since the last download."""
+        requests_args = {
+            cover.id: (cover.url, cover.image and cover.etag, cover.image and cover.last_modified)
+            for cover in self
+        }
+        # Workers only do HTTP; results are written back on this thread's cursor
+        with ThreadPoolExecutor(max_workers=COVER_WORKERS) as executor:
+            futures = {
+                cover_id: executor.submit(self._download, *args)
+                for cover_id, args in requests_args.items()
+            }
+        now = fields.Datetime.now()
+        for cover in self:
+            vals = {'date_fetched': now, 'error_message': False, 'state': 'done'}
+            try:
+                response = futures[cover.id].result()
+            except requests.RequestException as e:
+                _logger.warning("Failed to download cover %s: %s", cover.url, e)
+                cover.write({**vals, 'state': 'error', 'error_message': str(e)})
+                continue
+            if response.status_code != 304:
+                content = response.content
+                checksum = hashlib.sha1(content).hexdigest()
+                if checksum != cover.checksum:
+                    vals.update(image=base64.b64encode(content), checksum=checksum)
+            vals.update(
+                etag=response.headers.get('ETag') or cover.etag,
+                last_modified=response.headers.get('Last-Modified') or cover.last_modified,
+            )
+            cover.write(vals)
+
+    @staticmethod
+    def _download(url, etag=None, last_modified=None):
+        headers = {}
+        if etag:
+            headers['If-None-Match'] = etag
+        if last_modified:
+            headers['If-Modified-Since'] = last_modified
+        response = get_client('covers').get(url, headers=headers, timeout=15)
+        if response.status_code != 304:
+            response.raise_for_status()
+        return response
+
+    def _apply(self):
+        """Set downloaded covers on the products still pointing at them with another image."""
+        covers = self.filtered(lambda c: c.state == 'done' and c.checksum)
+        if not covers:
+            return
+        # One lookup for the whole chunk
+        products_by_url = self.env['product.template'].with_context(active_test=False).search([
+            ('x_cover_url', 'in', covers.mapped('url')),
+        ]).grouped('x_cover_url')
+        for cover in covers:
+            products = products_by_url.get(cover.url, self.env['product.template']).filtered(
+                lambda p: p.x_cover_checksum != cover.checksum
+            )
+            if not products:
+                continue
+            try:
+                with self.env.cr.savepoint():
+                    # One write per cover: the resized variants are computed once and
+                    # the filestore keeps a single copy of each, shared by every edition
+                    products.write({'image_1920': cover.image, 'x_cover_checksum': cover.checksum})
+            except Exception as e:
+                _logger.warning("Failed to set cover %s on %s products: %s", cover.url, len(products), e)
+                cover.write({'state': 'error', 'error_message': str(e)})
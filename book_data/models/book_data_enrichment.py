@@ -0,0 +1,95 @@
+import logging
+import time
+
+from odoo import api, fields, models, _
+
+from odoo.addons.bookstore.tools.isbn import to_isbn13
+
+_logger = logging.getLogger(__name__)
+
+# Products enriched per chunk; each chunk is committed on its own
+ENRICH_CHUNK_SIZE = 200
+# Seconds a single cron run may spend before handing over to the next run
+ENRICH_TIME_BUDGET = 240
+
+
+class BookDataEnrichment(models.Model):
+    _name = 'book.data.enrichment'
+    _description = 'Book Data Enrichment Queue'
+    _rec_name = 'product_tmpl_id'
+    _order = 'id'
+
+    product_tmpl_id = fields.Many2one(
+        'product.template', string='Product', required=True, readonly=True, index=True, ondelete='cascade',
+    )
+    state = fields.Selection([
+        ('pending', 'Pending'),
+        ('done', 'Done'),
+        ('not_found', 'Not Found'),
+        ('error', 'Error'),
+    ], string='Status', default='pending', required=True, readonly=True, index=True)
+    error_message = fields.Text(string='Error', readonly=True)
+    date_done = fields.Datetime(string='Processed On', readonly=True)
+
+    @api.model
+    def _enqueue(self, products):
+        """Queue products for enrichment, skipping those already pending. Returns the number queued."""
+        pending = self.search([
+            ('product_tmpl_id', 'in', products.ids),
+            ('state', '=', 'pending'),
+        ]).product_tmpl_id
+        to_queue = products - pending
+        self.create([{'product_tmpl_id': product.id} for product in to_queue])
+        self.env.ref('book_data.ir_cron_book_data_enrichment')._trigger()
+        return len(to_queue)
+
+    @api.model
+    def _cron_process(self):
+        """Scheduled action: enrich pending products chunk by chunk.
+
+        Every chunk is committed, so an interrupted run resumes where it
+        stopped. When the time budget is spent the cron reports the remaining
+        work and is rescheduled instead of running into the worker time limit.
+        """
+        start = time.monotonic()
+        done = 0
+        while time.monotonic() - start < ENRICH_TIME_BUDGET:
+            jobs = self.search([('state', '=', 'pending')], limit=ENRICH_CHUNK_SIZE)
+            if not jobs:
+                break
+            jobs._process()
+            done += len(jobs)
+            self.env['ir.cron']._notify_progress(
+                done=done, remaining=self.search_count([('state', '=', 'pending')]),
+            )
+            self.env.cr.commit()
+        _logger.info("Book data enrichment: processed %s products in %.1fs", done, time.monotonic() - start)
+
+    def _process(self):
+        """Fetch and apply book data for a chunk of queued products."""
+        isbns = {job: to_isbn13(job.product_tmpl_id.barcode) or '' for job in self}
+        fetched = self.env['product.template']._book_data_fetch_batch(list(set(isbns.values()) - {''}))
+
+        for job in self:
+            isbn = isbns[job]
+            result = fetched.get(isbn)
+            vals = {'date_done': fields.Datetime.now(), 'error_message': False}
+            if not result:
+                job.write({**vals, 'state': 'error', 'error_message': _('The product has no ISBN barcode.')})
+                continue
+            try:
+                with self.env.cr.savepoint():
+                    product_vals, _sources = job.product_tmpl_id._book_data_vals(result)
+                    if product_vals:
+                        job.product_tmpl_id.write(product_vals)
+            except Exception as e:
+                _logger.warning("Failed to apply book data for ISBN %s: %s", isbn, e)
+                job.write({**vals, 'state': 'error', 'error_message': str(e)})
+                continue
+            if result['hardcover'] or result['titlepage'] is not None:
+                vals['state'] = 'done'
+            elif result['errors']:
+                vals.update(state='error', error_message='\n'.join(result['errors']))
+            else:
+                vals['state'] = 'not_found'
+            job.write(vals)
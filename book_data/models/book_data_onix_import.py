@@ -0,0 +1,296 @@
+import io
+import logging
+import os
+import shutil
+import time
+
+from odoo import api, fields, models, _
+
+from odoo.addons.book_data.tools import onix
+
+_logger = logging.getLogger(__name__)
+
+# ONIX Products upserted (and committed) per batch
+ONIX_IMPORT_BATCH = 500
+# Seconds a single cron run may spend before handing over to the next run
+ONIX_IMPORT_TIME_BUDGET = 240
+ONIX_FILE_EXTENSIONS = ('.xml', '.onx', '.onix')
+# Files modified more recently than this may still be being uploaded and are left for the next run
+ONIX_FILE_SETTLE_SECONDS = 120
+# Keep at most this many product errors in the import log
+ONIX_MAX_LOGGED_ERRORS = 50
+
+
+class BookDataOnixImport(models.Model):
+    _name = 'book.data.onix.import'
+    _description = 'ONIX Feed Import'
+    _rec_name = 'filename'
+    _order = 'create_date desc, id desc'
+
+    filename = fields.Char(string='File', required=True, readonly=True)
+    source = fields.Selection([
+        ('upload', 'Upload'),
+        ('directory', 'Directory'),
+    ], string='Source', required=True, readonly=True)
+    attachment_id = fields.Many2one('ir.attachment', string='Attachment', readonly=True, ondelete='set null')
+    file_path = fields.Char(string='File Path', readonly=True)
+    force = fields.Boolean(
+        string='Overwrite Existing Values', readonly=True,
+        help="Overwrite fields that are already set instead of only filling empty ones.",
+    )
+    create_missing = fields.Boolean(string='Create Missing Products', readonly=True)
+    state = fields.Selection([
+        ('pending', 'Pending'),
+        ('running', 'Running'),
+        ('done', 'Done'),
+        ('error', 'Error'),
+    ], string='Status', default='pending', required=True, readonly=True, index=True)
+    date_start = fields.Datetime(string='Started', readonly=True)
+    date_done = fields.Datetime(string='Finished', readonly=True)
+    duration = fields.Float(string='Duration (s)', readonly=True)
+    product_count = fields.Integer(string='Products Read', readonly=True)
+    created_count = fields.Integer(string='Created', readonly=True)
+    updated_count = fields.Integer(string='Updated', readonly=True)
+    skipped_count = fields.Integer(string='Skipped', readonly=True)
+    error_count = fields.Integer(string='Errors', readonly=True)
+    throughput = fields.Float(string='Products / s', compute='_compute_throughput')
+    error_message = fields.Text(string='Errors', readonly=True)
+
+    @api.depends('product_count', 'duration')
+    def _compute_throughput(self):
+        for rec in self:
+            rec.throughput = rec.product_count / rec.duration if rec.duration else 0.0
+
+    # ---- Scheduling ----
+
+    @api.model
+    def _cron_process(self):
+        """Scheduled action: pick up feeds from the watched directory and import pending feeds."""
+        self._scan_directory()
+        start = time.monotonic()
+        done = 0
+        for feed in self.search([('state', 'in', ('pending', 'running'))], order='id'):
+            if time.monotonic() - start >= ONIX_IMPORT_TIME_BUDGET:
+                break
+            feed._import(deadline=start + ONIX_IMPORT_TIME_BUDGET)
+            done += feed.state in ('done', 'error')
+        remaining = self.search_count([('state', 'in', ('pending', 'running'))])
+        self.env['ir.cron']._notify_progress(done=done, remaining=remaining)
+
+    @api.model
+    def _scan_directory(self):
+        """Queue every ONIX file dropped in the watched directory, moving it to ``processing/``.
+
+        Files still being written (modified in the last ``ONIX_FILE_SETTLE_SECONDS``)
+        are picked up by a later run.
+        """
+        directory = self.env['ir.config_parameter'].sudo().get_param('book_data.onix_import_dir')
+        if not directory:
+            return
+        if not os.path.isdir(directory):
+            _logger.warning("ONIX import directory %s does not exist", directory)
+            return
+        processing = os.path.join(directory, 'processing')
+        os.makedirs(processing, exist_ok=True)
+        settled = time.time() - ONIX_FILE_SETTLE_SECONDS
+        for name in sorted(os.listdir(directory)):
+            path = os.path.join(directory, name)
+            if not os.path.isfile(path) or not name.lower().endswith(ONIX_FILE_EXTENSIONS):
+                continue
+            if os.path.getmtime(path) > settled:
+                _logger.debug("ONIX import: %s was modified recently, leaving it for the next run", path)
+                continue
+            target = os.path.join(processing, name)
+            shutil.move(path, target)
+            self.create({
+                'filename': name,
+                'source': 'directory',
+                'file_path': target,
+                'create_missing': True,
+            })
+            _logger.info("ONIX import: queued %s", path)
+        self.env.cr.commit()
+
+    # ---- Import ----
+
+    def _open(self):
+        self.ensure_one()
+        if self.source == 'upload':
+            attachment = self.attachment_id.sudo()
+            if attachment.store_fname:
+                # Stream from the filestore rather than loading the whole feed in memory
+                return open(attachment._full_path(attachment.store_fname), 'rb')
+            return io.BytesIO(attachment.raw)
+        return open(self.file_path, 'rb')
+
+    def _import(self, deadline=None):
+        """Stream the feed and upsert its products batch by batch.
+
+        Counters are committed with every batch, so a feed interrupted by the
+        time budget or a restart resumes after the last committed Product.
+        """
+        self.ensure_one()
+        resume_at = self.product_count
+        self.write({'state': 'running', 'date_start': self.date_start or fields.Datetime.now()})
+        self.env.cr.commit()
+        started = time.monotonic()
+        errors = (self.error_message or '').splitlines()
+        stats = {'created_count': 0, 'updated_count': 0, 'skipped_count': 0, 'error_count': 0}
+        position = 0
+        batch = []
+        try:
+            with self._open() as stream:
+                for product in onix.iter_products(stream):
+                    position += 1
+                    if position <= resume_at:
+                        continue
+                    try:
+                        batch.append(onix.extract_product(product))
+                    except Exception as e:
+                        stats['error_count'] += 1
+                        errors.append(_("Product #%s: %s", position, e))
+                    if len(batch) >= ONIX_IMPORT_BATCH:
+                        self._import_batch(batch, stats, errors)
+                        started = self._commit_progress(position, stats, errors, started)
+                        batch = []
+                        if deadline and time.monotonic() >= deadline:
+                            _logger.info("ONIX import %s: time budget spent at product %s, resuming later",
+                                         self.filename, position)
+                            return
+                if batch:
+                    self._import_batch(batch, stats, errors)
+                self._commit_progress(position, stats, errors, started, state='done')
+        except Exception as e:
+            self.env.cr.rollback()
+            _logger.exception("ONIX import %s failed", self.filename)
+            self.write({
+                'state': 'error',
+                'date_done': fields.Datetime.now(),
+                'error_message': '\n'.join(errors[-ONIX_MAX_LOGGED_ERRORS:] + [str(e)]),
+            })
+            self._archive_file('failed')
+            self.env.cr.commit()
+            return
+        _logger.info("ONIX import %s: %s products in %.1fs (%.0f/s), %s created, %s updated, %s errors",
+                     self.filename, self.product_count, self.duration, self.throughput,
+                     self.created_count, self.updated_count, self.error_count)
+        self._archive_file('processed')
+
+    def _commit_progress(self, position, stats, errors, started, state=None):
+        """Add the batch counters to the log and commit. Returns the new start time for ``duration``."""
+        vals = {
+            'product_count': position,
+            'duration': self.duration + time.monotonic() - started,
+            'error_message': '\n'.join(errors[-ONIX_MAX_LOGGED_ERRORS:]),
+        }
+        for key, count in stats.items():
+            vals[key] = self[key] + count
+            stats[key] = 0
+        if state:
+            vals.update(state=state, date_done=fields.Datetime.now())
+        self.write(vals)
+        self.env.cr.commit()
+        return time.monotonic()
+
+    def _archive_file(self, folder):
+        if self.source != 'directory' or not self.file_path or not os.path.isfile(self.file_path):
+            return
+        directory = os.path.join(os.path.dirname(os.path.dirname(self.file_path)), folder)
+        os.makedirs(directory, exist_ok=True)
+        target = os.path.join(directory, os.path.basename(self.file_path))
+        shutil.move(self.file_path, target)
+        self.file_path = target
+        self.env.cr.commit()
+
+    def _import_batch(self, batch, stats, errors):
+        """Upsert one batch of extracted Products, matching them on ISBN-13 with a single query."""
+        Product = self.env['product.template']
+        isbns = [data['isbn'] for data in batch if data['isbn']]
+        self.env.cr.execute("""
+            SELECT pp.x_isbn13, pp.product_tmpl_id
+            FROM product_product pp
+            WHERE pp.x_isbn13 = ANY(%s)
+        """, (isbns,))
+        template_ids = dict(self.env.cr.fetchall())
+        existing = Product.browse(set(template_ids.values()))
+        # Warm the cache for the fields compared in _titlepage_vals in one go
+        existing.fetch(['name', 'x_author', 'x_publisher', 'x_publication_date',
+                        'description_ecommerce', 'weight', 'seller_ids'])
+
+        to_create = []
+        # Products getting the same values are written together: {repr(vals): (vals, template ids)}
+        to_write = {}
+        # RRPs of existing products, applied together after the batch
+        prices = {}
+        matched, updated = set(), set()
+        seen = set()
+        for data in batch:
+            isbn = data['isbn']
+            if not isbn or isbn in seen:
+                stats['skipped_count'] += 1
+                continue
+            seen.add(isbn)
+            try:
+                if isbn in template_ids:
+                    product = Product.browse(template_ids[isbn])
+                    vals = product._titlepage_vals(data, force=self.force)
+                    if 'list_price' in vals:
+                        prices[product.id] = vals.pop('list_price')
+                    if vals:
+                        to_write.setdefault(repr(sorted(vals.items())), (vals, []))[1].append(product.id)
+                    matched.add(product.id)
+                elif self.create_missing:
+                    vals = Product._titlepage_vals(data, force=True)
+                    to_create.append({'name': isbn, **vals, 'barcode': isbn, 'default_code': isbn})
+                else:
+                    stats['skipped_count'] += 1
+            except Exception as e:
+                stats['error_count'] += 1
+                errors.append(_("ISBN %s: %s", isbn, e))
+
+        for vals, product_ids in to_write.values():
+            updated.update(self._write_products(Product.browse(product_ids), vals, stats, errors))
+
+        if prices:
+            try:
+                with self.env.cr.savepoint():
+                    # One UPDATE for the batch, skipping unchanged prices
+                    updated.update(Product._bulk_reprice(prices))
+            except Exception as e:
+                stats['error_count'] += 1
+                errors.append(_("Prices: %s", e))
+        stats['updated_count'] += len(updated)
+        stats['skipped_count'] += len(matched - updated)
+
+        if to_create:
+            try:
+                with self.env.cr.savepoint():
+                    Product.create(to_create)
+                stats['created_count'] += len(to_create)
+            except Exception:
+                # Fall back to one by one to isolate the offending products
+                for vals in to_create:
+                    try:
+                        with self.env.cr.savepoint():
+                            Product.create(vals)
+                        stats['created_count'] += 1
+                    except Exception as e:
+                        stats['error_count'] += 1
+                        errors.append(_("ISBN %s: %s", vals['barcode'], e))
+
+    def _write_products(self, products, vals, stats, errors):
+        """Write the same ``vals`` on ``products`` at once. Returns the ids written."""
+        try:
+            with self.env.cr.savepoint():
+                products.write(vals)
+            return products.ids
+        except Exception as e:
+            if len(products) == 1:
+                stats['error_count'] += 1
+                errors.append(_("ISBN %s: %s", products.product_variant_ids[:1].x_isbn13, e))
+                return []
+        # Fall back to one by one to isolate the offending products
+        written = []
+        for product in products:
+            written += self._write_products(product, vals, stats, errors)
+        return written
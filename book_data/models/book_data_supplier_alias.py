@@ -0,0 +1,82 @@
+import logging
+
+from odoo import api, fields, models
+
+from .res_partner import normalize_supplier_name
+
+_logger = logging.getLogger(__name__)
+
+# Key of the supplier name -> partner id memo in the transaction data, which
+# is dropped on commit and rollback so other workers' changes are seen
+SUPPLIER_MEMO_KEY = 'book_data_supplier_partners'
+
+
+class BookDataSupplierAlias(models.Model):
+    _name = 'book.data.supplier.alias'
+    _description = 'Book Data Supplier Alias'
+    _order = 'name'
+
+    name = fields.Char(
+        string='Supplier Name', required=True,
+        help="Supplier name as it appears in Titlepage and ONIX data.",
+    )
+    name_normalized = fields.Char(
+        string='Normalized Name', compute='_compute_name_normalized', store=True, index=True,
+    )
+    partner_id = fields.Many2one('res.partner', string='Vendor', required=True, ondelete='cascade')
+
+    _sql_constraints = [
+        ('name_normalized_uniq', 'unique(name_normalized)', 'An alias for this supplier name already exists.'),
+    ]
+
+    @api.depends('name')
+    def _compute_name_normalized(self):
+        for alias in self:
+            alias.name_normalized = normalize_supplier_name(alias.name)
+
+    @api.model_create_multi
+    def create(self, vals_list):
+        self.env.cr.precommit.data.pop(SUPPLIER_MEMO_KEY, None)
+        return super().create(vals_list)
+
+    def write(self, vals):
+        self.env.cr.precommit.data.pop(SUPPLIER_MEMO_KEY, None)
+        return super().write(vals)
+
+    def unlink(self):
+        self.env.cr.precommit.data.pop(SUPPLIER_MEMO_KEY, None)
+        return super().unlink()
+
+    @api.model
+    def _resolve(self, supplier_name):
+        """Return the vendor matching a supplier name found in book data, or an empty recordset.
+
+        Names are matched on their normalized form: an explicit alias wins, then
+        a partner with the same name, then the closest partner containing it.
+        Results, misses included, are memoized for the current transaction so a
+        batch resolves each distributor once rather than once per title.
+        """
+        Partner = self.env['res.partner']
+        key = normalize_supplier_name(supplier_name)
+        if not key:
+            return Partner
+        memo = self.env.cr.precommit.data.setdefault(SUPPLIER_MEMO_KEY, {})
+        if key not in memo:
+            memo[key] = self._match(key).id
+            if not memo[key]:
+                _logger.info("No partner found matching supplier: %s", supplier_name)
+        return Partner.browse(memo[key])
+
+    @api.model
+    def _match(self, key):
+        alias = self.sudo().search([('name_normalized', '=', key)], limit=1)
+        if alias:
+            return alias.partner_id
+        Partner = self.env['res.partner']
+        partner = Partner.search([('x_name_normalized', '=', key)], order='supplier_rank desc, id', limit=1)
+        if not partner:
+            # Served by the trigram index on x_name_normalized
+            partner = Partner.search(
+                [('x_name_normalized', 'ilike', key)], order='supplier_rank desc, id', limit=1,
+            )
+        return partner
@@ -1,23 +1,34 @@
-import base64
+import io
 import logging
 import math
+import time
 import xml.etree.ElementTree as ET
+from concurrent.futures import ThreadPoolExecutor, as_completed, wait
 
 import requests
 
-from odoo import api, models, _
+from odoo import api, fields, models, Command, _
 from odoo.exceptions import UserError
+from odoo.models import NewId
+
+from odoo.addons.book_data.tools import onix
+from odoo.addons.bookstore.tools.isbn import to_isbn13
+from odoo.addons.book_data.tools.provider_client import get_client
 
 _logger = logging.getLogger(__name__)
 
 TITLEPAGE_API_URL = 'https://report.titlepage.com/ReST/v1/onix-full'
-ONIX_NS = '{http://ns.editeur.org/onix/3.1/reference}'
 
 HARDCOVER_API_URL = 'https://api.hardcover.app/v1/graphql'
 
-HARDCOVER_EDITION_QUERY = """
-query GetBookByISBN($isbn: String!) {
-			editions(where: { isbn_13: { _eq: $isbn } }) {
+# Overall budget (seconds) for fetching from all providers, cover downloads included
+BOOK_DATA_FETCH_DEADLINE = 15
+
+# Bulk enrichment: ISBNs per Hardcover query and concurrent Titlepage/image requests
+BULK_HARDCOVER_BATCH = 50
+BULK_WORKERS = 8
+
+HARDCOVER_EDITION_FIELDS = """
 				isbn_13
 				isbn_10
 				title
@@ -48,64 +59,95 @@ query GetBookByISBN($isbn: String!) {
 						}
 					}
 				}
-			}
-		}
 """
 
+HARDCOVER_EDITION_QUERY = """
+query GetBookByISBN($isbn: String!) {
+			editions(where: { isbn_13: { _eq: $isbn } }) {
+%s			}
+		}
+""" % HARDCOVER_EDITION_FIELDS
+
+HARDCOVER_EDITIONS_QUERY = """
+query GetBooksByISBN($isbns: [String!]!) {
+			editions(where: { isbn_13: { _in: $isbns } }) {
+%s			}
+		}
+""" % HARDCOVER_EDITION_FIELDS
+
 
 class ProductTemplate(models.Model):
     _inherit = 'product.template'
 
+    x_cover_url = fields.Char(
+        string='Cover URL', copy=False, index='btree_not_null',
+        help="Cover image found by the book data providers. It is downloaded and set as product image in the background.",
+    )
+    x_cover_checksum = fields.Char(
+        string='Cover Checksum', copy=False, readonly=True,
+        help="SHA-1 of the downloaded cover currently set as product image.",
+    )
+
+    @api.model_create_multi
+    def create(self, vals_list):
+        products = super().create(vals_list)
+        products.filtered('x_cover_url')._book_data_queue_covers()
+        return products
+
+    def write(self, vals):
+        res = super().write(vals)
+        if vals.get('x_cover_url'):
+            self._book_data_queue_covers()
+        return res
+
+    def _book_data_queue_covers(self):
+        """Hand the cover URLs of these products to the background cover pipeline."""
+        urls = set(self.mapped('x_cover_url'))
+        if urls:
+            self.env['book.data.cover'].sudo()._enqueue(urls)
+
     @api.onchange('barcode')
     def _onchange_barcode_fetch_book_data(self):
         """Automatically fetch book data from Hardcover and Titlepage when ISBN barcode is entered."""
-        if not self.barcode or not self.barcode.startswith(('978', '979')):
+        isbn = to_isbn13(self.barcode)
+        if not isbn:
             return
         
         # Copy barcode to internal reference field
         if self.barcode and not self.default_code:
             self.default_code = self.barcode
 
+        fetched = self._book_data_fetch(isbn)
+        if fetched is None:
+            return {
+                'warning': {
+                    'title': _('Book Data APIs Not Configured'),
+                    'message': _('Configure API keys in Settings > Inventory > Barcode to auto-fetch book data.'),
+                }
+            }
+
         all_vals = {}
-        sources = []
-        config = self.env['ir.config_parameter'].sudo()
 
-        # Try Hardcover
-        hardcover_key = config.get_param('book_data.hardcover_api_key')
-        if hardcover_key:
+        # Hardcover
+        if fetched['hardcover']:
             try:
-                edition = self._hardcover_fetch_edition(self.barcode, hardcover_key)
-                if edition:
-                    vals = self._hardcover_parse_edition(edition)
-                    if vals:
-                        all_vals.update(vals)
-                        sources.append('Hardcover')
+                vals = self._hardcover_parse_edition(fetched['hardcover'])
+                if vals:
+                    all_vals.update(vals)
             except Exception as e:
-                _logger.warning("Failed to fetch Hardcover data for ISBN %s: %s", self.barcode, e)
+                _logger.warning("Failed to parse Hardcover data for ISBN %s: %s", self.barcode, e)
 
-        # Try Titlepage
-        titlepage_token = config.get_param('book_data.titlepage_api_token')
-        if titlepage_token:
+        # Titlepage
+        if fetched['titlepage'] is not None:
             try:
-                product_xml = self._titlepage_fetch_product(self.barcode, titlepage_token)
-                if product_xml is not None:
-                    # Apply Hardcover vals first so Titlepage only fills gaps
-                    if all_vals:
-                        self.update(all_vals)
-                    vals = self._titlepage_parse_product(product_xml)
-                    if vals:
-                        all_vals.update(vals)
-                        sources.append('Titlepage')
+                # Apply Hardcover vals first so Titlepage only fills gaps
+                if all_vals:
+                    self.update(all_vals)
+                vals = self._titlepage_parse_product(fetched['titlepage'])
+                if vals:
+                    all_vals.update(vals)
             except Exception:
-                _logger.exception("Failed to fetch Titlepage data for ISBN %s", self.barcode)
-
-        if not hardcover_key and not titlepage_token:
-            return {
-                'warning': {
-                    'title': _('Book Data APIs Not Configured'),
-                    'message': _('Configure API keys in Settings > Inventory > Barcode to auto-fetch book data.'),
-                }
-            }
+                _logger.exception("Failed to parse Titlepage data for ISBN %s", self.barcode)
 
         if all_vals:
             self.update(all_vals)
@@ -113,41 +155,15 @@ class ProductTemplate(models.Model):
     def action_refresh_book_data(self):
         """Button action to refresh book data from external APIs, overwriting existing values."""
         self.ensure_one()
-        if not self.barcode or not self.barcode.startswith(('978', '979')):
-            raise UserError(_('A valid ISBN barcode (starting with 978 or 979) is required to fetch book data.'))
-
-        hardcover_vals = {}
-        titlepage_vals = {}
-        sources = []
-        config = self.env['ir.config_parameter'].sudo()
-
-        hardcover_key = config.get_param('book_data.hardcover_api_key')
-        if hardcover_key:
-            try:
-                edition = self._hardcover_fetch_edition(self.barcode, hardcover_key)
-                if edition:
-                    hardcover_vals = self._hardcover_parse_edition(edition, force=True)
-                    if hardcover_vals:
-                        sources.append('Hardcover')
-            except Exception as e:
-                _logger.warning("Failed to fetch Hardcover data for ISBN %s: %s", self.barcode, e)
+        isbn = to_isbn13(self.barcode)
+        if not isbn:
+            raise UserError(_('A valid ISBN barcode is required to fetch book data.'))
 
-        titlepage_token = config.get_param('book_data.titlepage_api_token')
-        if titlepage_token:
-            try:
-                product_xml = self._titlepage_fetch_product(self.barcode, titlepage_token)
-                if product_xml is not None:
-                    titlepage_vals = self._titlepage_parse_product(product_xml, force=True)
-                    if titlepage_vals:
-                        sources.append('Titlepage')
-            except Exception:
-                _logger.exception("Failed to fetch Titlepage data for ISBN %s", self.barcode)
-
-        if not hardcover_key and not titlepage_token:
+        fetched = self._book_data_fetch(isbn)
+        if fetched is None:
             raise UserError(_('Configure API keys in Settings > Inventory > Barcode to auto-fetch book data.'))
 
-        # Titlepage as base, Hardcover overwrites (Hardcover takes priority)
-        all_vals = {**titlepage_vals, **hardcover_vals}
+        all_vals, sources = self._book_data_vals(fetched, force=True)
         if all_vals:
             self.write(all_vals)
 
@@ -165,6 +181,52 @@ class ProductTemplate(models.Model):
 
         raise UserError(_('No book data found for ISBN %s.') % self.barcode)
 
+    def action_enqueue_book_data(self):
+        """Queue the selected products for background enrichment from the book data APIs."""
+        books = self.filtered('x_is_isbn')
+        if not books:
+            raise UserError(_('None of the selected products has an ISBN barcode.'))
+        count = self.env['book.data.enrichment'].sudo()._enqueue(books)
+        return {
+            'type': 'ir.actions.client',
+            'tag': 'display_notification',
+            'params': {
+                'title': _('Book Data Queued'),
+                'message': _('%s products queued for enrichment. They will be updated in the background.') % count,
+                'type': 'success',
+                'sticky': False,
+            },
+        }
+
+    def _book_data_vals(self, fetched, force=False):
+        """Parse fetched provider data into a single dict of field values.
+
+        Titlepage is the base and Hardcover overwrites it (Hardcover takes
+        priority). Returns ``(vals, sources)``.
+        """
+        self.ensure_one()
+        hardcover_vals = {}
+        titlepage_vals = {}
+        sources = []
+
+        if fetched['hardcover']:
+            try:
+                hardcover_vals = self._hardcover_parse_edition(fetched['hardcover'], force=force)
+                if hardcover_vals:
+                    sources.append('Hardcover')
+            except Exception as e:
+                _logger.warning("Failed to parse Hardcover data for ISBN %s: %s", self.barcode, e)
+
+        if fetched['titlepage'] is not None:
+            try:
+                titlepage_vals = self._titlepage_parse_product(fetched['titlepage'], force=force)
+                if titlepage_vals:
+                    sources.append('Titlepage')
+            except Exception:
+                _logger.exception("Failed to parse Titlepage data for ISBN %s", self.barcode)
+
+        return {**titlepage_vals, **hardcover_vals}, sources
+
     def action_view_on_hardcover(self):
         """Open Hardcover search page for this product's ISBN in a new tab."""
         self.ensure_one()
@@ -174,9 +236,139 @@ class ProductTemplate(models.Model):
             'target': 'new',
         }
 
+    # --- Fetch pipeline ---
+
     @api.model
-    def _hardcover_fetch_edition(self, isbn, api_key):
-        """Fetch edition data from Hardcover GraphQL API."""
+    def _book_data_fetch(self, isbn):
+        """Fetch raw data for an ISBN from every configured provider concurrently.
+
+        Responses are served from ``book.data.cache`` when still fresh. Other
+        providers run in their own worker thread and share one deadline, so the
+        total latency is bounded by the slowest provider rather than the sum of
+        all calls. Covers are not downloaded here, see ``book.data.cover``.
+
+        Returns None if no provider is configured, otherwise a dict with the
+        Hardcover ``edition`` dict and the Titlepage ONIX ``Product`` element.
+        Providers that failed or missed the deadline are left as None.
+        """
+        config = self.env['ir.config_parameter'].sudo()
+        tokens = {
+            'hardcover': config.get_param('book_data.hardcover_api_key'),
+            'titlepage': config.get_param('book_data.titlepage_api_token'),
+        }
+        if not any(tokens.values()):
+            return None
+
+        deadline = time.monotonic() + BOOK_DATA_FETCH_DEADLINE
+        result = {'hardcover': None, 'titlepage': None}
+        cache = self.env['book.data.cache'].sudo()
+        workers = {
+            'hardcover': lambda token: self._hardcover_fetch_edition(
+                isbn, token, timeout=self._book_data_timeout(deadline, 10), deadline=deadline),
+            'titlepage': lambda token: self._titlepage_fetch_product(
+                isbn, token, timeout=self._book_data_timeout(deadline), deadline=deadline),
+        }
+        executor = ThreadPoolExecutor(max_workers=2, thread_name_prefix='book_data')
+        futures = {}
+        for provider, token in tokens.items():
+            if not token:
+                continue
+            hit, cached = cache._get(isbn, provider)
+            if hit:
+                result[provider] = cached
+                continue
+            # Workers run outside the request thread and must not use the cursor
+            futures[executor.submit(workers[provider], token)] = provider
+        try:
+            _done, not_done = wait(futures, timeout=max(deadline - time.monotonic(), 0))
+        finally:
+            # Don't block on stragglers, they are bounded by their own timeouts
+            executor.shutdown(wait=False, cancel_futures=True)
+
+        for future, provider in futures.items():
+            if future in not_done:
+                _logger.warning("%s lookup for ISBN %s exceeded the %ss deadline",
+                                provider.capitalize(), isbn, BOOK_DATA_FETCH_DEADLINE)
+                continue
+            try:
+                data = future.result()
+            except Exception as e:
+                _logger.warning("Failed to fetch %s data for ISBN %s: %s", provider.capitalize(), isbn, e)
+                continue
+            cache._put(isbn, provider, data)
+            result[provider] = data
+        return result
+
+    @api.model
+    def _book_data_fetch_batch(self, isbns):
+        """Bulk counterpart of ``_book_data_fetch`` for many ISBNs at once.
+
+        Cache misses are resolved with batched Hardcover ``_in`` queries and a
+        bounded pool of Titlepage requests. Returns a dict mapping each ISBN to
+        the same structure as ``_book_data_fetch``, plus an ``errors`` list.
+        """
+        config = self.env['ir.config_parameter'].sudo()
+        hardcover_key = config.get_param('book_data.hardcover_api_key')
+        titlepage_token = config.get_param('book_data.titlepage_api_token')
+        cache = self.env['book.data.cache'].sudo()
+        results = {
+            isbn: {'hardcover': None, 'titlepage': None, 'errors': []}
+            for isbn in isbns
+        }
+
+        if hardcover_key:
+            hits = cache._get_many(isbns, 'hardcover')
+            misses = [isbn for isbn in isbns if isbn not in hits]
+            for isbn, edition in hits.items():
+                results[isbn]['hardcover'] = edition
+            for i in range(0, len(misses), BULK_HARDCOVER_BATCH):
+                chunk = misses[i:i + BULK_HARDCOVER_BATCH]
+                try:
+                    editions = self._hardcover_fetch_editions(chunk, hardcover_key)
+                except Exception as e:
+                    _logger.warning("Failed to fetch Hardcover data for %s ISBNs: %s", len(chunk), e)
+                    for isbn in chunk:
+                        results[isbn]['errors'].append(str(e))
+                    continue
+                for isbn in chunk:
+                    cache._put(isbn, 'hardcover', editions.get(isbn))
+                    results[isbn]['hardcover'] = editions.get(isbn)
+
+        if titlepage_token:
+            hits = cache._get_many(isbns, 'titlepage')
+            for isbn, product in hits.items():
+                results[isbn]['titlepage'] = product
+            with ThreadPoolExecutor(max_workers=BULK_WORKERS, thread_name_prefix='book_data') as executor:
+                futures = {
+                    executor.submit(self._titlepage_fetch_product, isbn, titlepage_token): isbn
+                    for isbn in isbns if isbn not in hits
+                }
+                for future in as_completed(futures):
+                    isbn = futures[future]
+                    try:
+                        product = future.result()
+                    except Exception as e:
+                        _logger.warning("Failed to fetch Titlepage data for ISBN %s: %s", isbn, e)
+                        results[isbn]['errors'].append(str(e))
+                        continue
+                    cache._put(isbn, 'titlepage', product)
+                    results[isbn]['titlepage'] = product
+
+        return results
+
+    @staticmethod
+    def _book_data_timeout(deadline, default=15):
+        """Per-request timeout that never runs past the overall fetch deadline."""
+        return max(min(default, deadline - time.monotonic()), 0.1)
+
+    # --- Hardcover ---
+
+    @api.model
+    def _hardcover_fetch_edition(self, isbn, api_key, timeout=10, deadline=None):
+        """Fetch edition data from Hardcover GraphQL API.
+
+        ``deadline`` (a ``time.monotonic()`` value) bounds retries and rate limit waits.
+        """
         # Strip whitespace from ISBN
         isbn_clean = isbn.strip()
         
@@ -186,11 +378,12 @@ class ProductTemplate(models.Model):
         }
         try:
             _logger.debug(f"Querying Hardcover API for ISBN: {isbn_clean}")
-            response = requests.post(
+            response = get_client('hardcover').post(
                 HARDCOVER_API_URL,
                 json={'query': HARDCOVER_EDITION_QUERY, 'variables': {'isbn': isbn_clean}},
                 headers=headers,
-                timeout=10,
+                timeout=timeout,
+                deadline=deadline,
             )
             response.raise_for_status()
             data = response.json()
@@ -198,7 +391,7 @@ class ProductTemplate(models.Model):
             # Log the response for debugging
             if 'errors' in data:
                 _logger.warning(f"Hardcover API errors for ISBN {isbn_clean}: {data['errors']}")
-                return None
+                raise UserError(_("Hardcover API returned an error. Please try again later."))
             
             editions = data.get('data', {}).get('editions', [])
             _logger.debug(f"Hardcover API returned {len(editions)} editions for ISBN {isbn_clean}")
@@ -210,6 +403,41 @@ class ProductTemplate(models.Model):
             _logger.exception("Hardcover API request failed for ISBN %s: %s", isbn_clean, str(e))
             raise UserError(_("Failed to connect to Hardcover API. Please try again later."))
 
+    @api.model
+    def _hardcover_fetch_editions(self, isbns, api_key, timeout=30, deadline=None):
+        """Fetch editions for many ISBNs with a single Hardcover GraphQL query.
+
+        Returns a dict mapping ISBN-13 to its first edition. ISBNs without an
+        edition on Hardcover are left out. ``deadline`` bounds retries and
+        rate limit waits.
+        """
+        headers = {
+            'Content-Type': 'application/json',
+            'Authorization': f'Bearer {api_key}',
+        }
+        try:
+            _logger.debug("Querying Hardcover API for %s ISBNs", len(isbns))
+            response = get_client('hardcover').post(
+                HARDCOVER_API_URL,
+                json={'query': HARDCOVER_EDITIONS_QUERY, 'variables': {'isbns': list(isbns)}},
+                headers=headers,
+                timeout=timeout,
+                deadline=deadline,
+            )
+            response.raise_for_status()
+            data = response.json()
+            if 'errors' in data:
+                _logger.warning("Hardcover API errors for batch of %s ISBNs: %s", len(isbns), data['errors'])
+                raise UserError(_("Hardcover API returned an error. Please try again later."))
+            editions = {}
+            for edition in data.get('data', {}).get('editions', []):
+                if edition.get('isbn_13'):
+                    editions.setdefault(edition['isbn_13'], edition)
+            return editions
+        except requests.RequestException as e:
+            _logger.warning("Hardcover API batch request failed: %s", e)
+            raise UserError(_("Failed to connect to Hardcover API. Please try again later."))
+
     def _hardcover_parse_edition(self, edition, force=False):
         """Parse Hardcover edition response into product field values."""
         vals = {}
@@ -232,238 +460,174 @@ class ProductTemplate(models.Model):
         contributions = book.get('contributions') or []
         authors = [c['author']['name'] for c in contributions if c.get('author', {}).get('name')]
         if authors and (force or not self.x_author):
-            vals['x_author'] = ', '.join(authors)
+            vals.update(self._book_data_author_vals(authors))
 
         # Publisher - now at edition level
         publisher = edition.get('publisher')
         if publisher and isinstance(publisher, dict):
             publisher_name = publisher.get('name')
             if publisher_name and (force or not self.x_publisher):
-                vals['x_publisher'] = publisher_name
+                vals.update(self._book_data_publisher_vals(publisher_name))
 
         # Publication date
         release_date = edition.get('release_date')
         if release_date and (force or not self.x_publication_date):
             vals['x_publication_date'] = release_date
 
-        # Image (try edition first, fall back to book-level image)
-        image_url = None
-        cached_image = edition.get('cached_image')
-        if cached_image and isinstance(cached_image, dict):
-            image_url = cached_image.get('url')
-        if not image_url:
-            book_image = book.get('cached_image')
-            if book_image and isinstance(book_image, dict):
-                image_url = book_image.get('url')
+        # Image (try edition first, fall back to book-level image), downloaded later by book.data.cover
+        image_url = self._hardcover_image_url(edition)
         if image_url and (force or not self.image_1920):
-            image_data = self._hardcover_download_image(image_url)
-            if image_data:
-                vals['image_1920'] = image_data
+            vals['x_cover_url'] = image_url
 
         return vals
 
+    def _book_data_in_onchange(self):
+        return any(isinstance(id_, NewId) for id_ in self._ids)
+
     @api.model
-    def _hardcover_download_image(self, url):
-        """Download an image from URL and return base64-encoded data."""
-        try:
-            response = requests.get(url, timeout=15)
-            response.raise_for_status()
-            return base64.b64encode(response.content).decode('utf-8')
-        except requests.RequestException:
-            _logger.warning("Failed to download image from %s", url)
-            return None
+    def _book_data_author_vals(self, authors):
+        """Author string and records for a list of author names.
+
+        The records are resolved here, from the provider's own list, rather
+        than by splitting the joined string again. In a form onchange no
+        author is created: the records are only set when they all exist,
+        otherwise they are resolved from the string when the product is saved.
+        """
+        vals = {'x_author': ', '.join(authors)}
+        records = self.env['book.author']._resolve(authors, create=not self._book_data_in_onchange())
+        if records is not None:
+            vals['x_author_ids'] = [Command.set(records.ids)]
+        return vals
+
+    @api.model
+    def _book_data_publisher_vals(self, publisher):
+        """Publisher string and record; in a form onchange the record is not created, see above."""
+        vals = {'x_publisher': publisher}
+        record = self.env['book.publisher']._resolve(publisher, create=not self._book_data_in_onchange())
+        if record is not None:
+            vals['x_publisher_id'] = record.id
+        return vals
+
+    @staticmethod
+    def _hardcover_image_url(edition):
+        """Return the cover URL of a Hardcover edition, falling back to the book-level image."""
+        cached_image = edition.get('cached_image')
+        if cached_image and isinstance(cached_image, dict) and cached_image.get('url'):
+            return cached_image['url']
+        book_image = (edition.get('book') or {}).get('cached_image')
+        if book_image and isinstance(book_image, dict):
+            return book_image.get('url')
+        return None
 
     # --- Titlepage (ONIX 3.1) ---
 
-    def _titlepage_fetch_product(self, isbn, token):
-        """Fetch ONIX product XML from Titlepage API. Returns an Element or None."""
+    def _titlepage_fetch_product(self, isbn, token, timeout=15, deadline=None):
+        """Fetch ONIX product XML from Titlepage API.
+
+        Returns an Element, or None if Titlepage has no record for the ISBN.
+        Raises UserError when the request or the response is unusable.
+        ``deadline`` bounds retries and rate limit waits.
+        """
         isbn_clean = isbn.strip()
         url = f'{TITLEPAGE_API_URL}/{isbn_clean}'
         headers = {'Authorization': f'Token {token}'}
         try:
             _logger.debug("Querying Titlepage API for ISBN: %s", isbn_clean)
-            response = requests.get(url, headers=headers, timeout=15, allow_redirects=True)
+            response = get_client('titlepage').get(
+                url, headers=headers, timeout=timeout, deadline=deadline, allow_redirects=True,
+            )
             if response.status_code == 404:
                 return None
             response.raise_for_status()
-            root = ET.fromstring(response.content)
-            return root.find(f'{ONIX_NS}Product')
+            # Stop at the first Product instead of building the whole message tree
+            return next(onix.iter_products(io.BytesIO(response.content)), None)
         except requests.RequestException as e:
             _logger.warning("Titlepage API request failed for ISBN %s: %s", isbn_clean, e)
-            return None
+            raise UserError(_("Failed to connect to Titlepage API. Please try again later."))
         except ET.ParseError as e:
             _logger.warning("Failed to parse Titlepage ONIX XML for ISBN %s: %s", isbn_clean, e)
-            return None
-
-    @staticmethod
-    def _titlepage_find(element, path):
-        """Find a child element using ONIX-namespaced path."""
-        parts = path.split('/')
-        current = element
-        for part in parts:
-            if current is None:
-                return None
-            current = current.find(f'{ONIX_NS}{part}')
-        return current
-
-    @staticmethod
-    def _titlepage_findall(element, path):
-        """Find all matching child elements using ONIX-namespaced path."""
-        ns_path = '/'.join(f'{ONIX_NS}{p}' for p in path.split('/'))
-        return element.findall(ns_path)
+            raise UserError(_("Titlepage API returned an invalid ONIX response."))
 
     def _titlepage_parse_product(self, product, force=False):
         """Parse ONIX Product element into product field values.
         Only sets fields that are not already populated on self (unless force=True)."""
+        return self._titlepage_vals(onix.extract_product(product), force=force)
+
+    def _titlepage_vals(self, data, force=False):
+        """Map data extracted by ``onix.extract_product`` to product field values.
+        Only sets fields that are not already populated on self (unless force=True)."""
         vals = {}
-        _find = self._titlepage_find
-        _findall = self._titlepage_findall
-        descriptive = _find(product, 'DescriptiveDetail')
-        collateral = _find(product, 'CollateralDetail')
-        publishing = _find(product, 'PublishingDetail')
 
         # Title
-        if descriptive is not None and (force or not self.name):
-            for td in _findall(descriptive, 'TitleDetail'):
-                title_type = _find(td, 'TitleType')
-                if title_type is not None and title_type.text == '01':
-                    te = _find(td, 'TitleElement')
-                    if te is not None:
-                        title_text = _find(te, 'TitleText')
-                        subtitle = _find(te, 'Subtitle')
-                        if title_text is not None and title_text.text:
-                            name = title_text.text
-                            if subtitle is not None and subtitle.text:
-                                name = f"{name}: {subtitle.text}"
-                            vals['name'] = name
-                    break
+        if data['title'] and (force or not self.name):
+            vals['name'] = f"{data['title']}: {data['subtitle']}" if data['subtitle'] else data['title']
 
         # Author
-        if descriptive is not None and (force or not self.x_author):
-            authors = []
-            for contrib in _findall(descriptive, 'Contributor'):
-                role = _find(contrib, 'ContributorRole')
-                if role is None or role.text != 'A01':
-                    continue
-                name_el = _find(contrib, 'PersonName')
-                if name_el is not None and name_el.text:
-                    authors.append(name_el.text)
-                    continue
-                # Fall back to PersonNameInverted ("Last, First" -> "First Last")
-                inverted = _find(contrib, 'PersonNameInverted')
-                if inverted is not None and inverted.text:
-                    parts = [p.strip() for p in inverted.text.split(',', 1)]
-                    authors.append(' '.join(reversed(parts)) if len(parts) == 2 else inverted.text)
-                    continue
-                # Fall back to NamesBeforeKey + KeyNames
-                before = _find(contrib, 'NamesBeforeKey')
-                key = _find(contrib, 'KeyNames')
-                if key is not None and key.text:
-                    full = f"{before.text} {key.text}" if before is not None and before.text else key.text
-                    authors.append(full)
+        if force or not self.x_author:
+            authors = [c['name'] for c in data['contributors'] if c['role'] == 'A01' and c['name']]
             if authors:
-                vals['x_author'] = ', '.join(authors)
+                vals.update(self._book_data_author_vals(authors))
 
         # Publisher
-        if publishing is not None and (force or not self.x_publisher):
-            publisher_el = _find(publishing, 'Publisher/PublisherName')
-            if publisher_el is not None and publisher_el.text:
-                vals['x_publisher'] = publisher_el.text
+        if data['publisher'] and (force or not self.x_publisher):
+            vals.update(self._book_data_publisher_vals(data['publisher']))
 
         # Publication date (role 01 = publication date)
-        if publishing is not None and (force or not self.x_publication_date):
-            for pd in _findall(publishing, 'PublishingDate'):
-                role = _find(pd, 'PublishingDateRole')
-                if role is not None and role.text == '01':
-                    date_el = _find(pd, 'Date')
-                    if date_el is not None and date_el.text:
-                        raw = date_el.text
-                        # Convert YYYYMMDD to YYYY-MM-DD
-                        if len(raw) == 8 and raw.isdigit():
-                            raw = f"{raw[:4]}-{raw[4:6]}-{raw[6:8]}"
-                        vals['x_publication_date'] = raw
-                    break
+        raw = data['dates'].get('01')
+        if raw and (force or not self.x_publication_date):
+            # Convert YYYYMMDD to YYYY-MM-DD
+            if len(raw) == 8 and raw.isdigit():
+                raw = f"{raw[:4]}-{raw[4:6]}-{raw[6:8]}"
+            vals['x_publication_date'] = raw
 
         # Description (TextType 03 = main description)
-        if collateral is not None and (force or not self.description_ecommerce):
-            for tc in _findall(collateral, 'TextContent'):
-                text_type = _find(tc, 'TextType')
-                if text_type is not None and text_type.text == '03':
-                    text_el = _find(tc, 'Text')
-                    if text_el is not None and text_el.text:
-                        vals['description_ecommerce'] = text_el.text
-                    break
+        description = data['texts'].get('03')
+        if description and (force or not self.description_ecommerce):
+            vals['description_ecommerce'] = description
 
-        # Cover image (ResourceContentType 01 = front cover)
-        if collateral is not None and (force or not self.image_1920):
-            for sr in _findall(collateral, 'SupportingResource'):
-                rct = _find(sr, 'ResourceContentType')
-                if rct is not None and rct.text == '01':
-                    rv = _find(sr, 'ResourceVersion')
-                    if rv is not None:
-                        link = _find(rv, 'ResourceLink')
-                        if link is not None and link.text:
-                            image_data = self._hardcover_download_image(link.text)
-                            if image_data:
-                                vals['image_1920'] = image_data
-                    break
+        # Cover image, downloaded later by book.data.cover
+        if data['cover_url'] and (force or not self.image_1920):
+            vals['x_cover_url'] = data['cover_url']
 
         # Weight (MeasureType 08 = weight)
-        if descriptive is not None and (force or not self.weight):
-            for measure in _findall(descriptive, 'Measure'):
-                mtype = _find(measure, 'MeasureType')
-                if mtype is not None and mtype.text == '08':
-                    measurement = _find(measure, 'Measurement')
-                    if measurement is not None and measurement.text:
+        measurement, _unit = data['measures'].get('08', (None, None))
+        if measurement and (force or not self.weight):
+            try:
+                vals['weight'] = float(measurement) / 1000.0
+            except ValueError:
+                pass
+
+        # NZ supply: list price (PriceType 02, rounded up) and vendor from supplier name
+        for supply in data['supplies']:
+            if not supply['countries'] or 'NZ' not in supply['countries']:
+                continue
+            # List price (NZD only, PriceType 02 = RRP inc tax)
+            for price in supply['prices']:
+                if price['type'] == '02' and price['currency'] == 'NZD':
+                    if price['amount']:
                         try:
-                            grams = float(measurement.text)
-                            vals['weight'] = grams / 1000.0
+                            vals['list_price'] = math.ceil(float(price['amount']))
                         except ValueError:
                             pass
                     break
-
-        # NZ supply: list price (PriceType 02, rounded up) and vendor from supplier name
-        for ps in _findall(product, 'ProductSupply'):
-            market_territory = _find(ps, 'Market/Territory/CountriesIncluded')
-            if market_territory is not None and market_territory.text and 'NZ' in market_territory.text:
-                supply = _find(ps, 'SupplyDetail')
-                if supply is not None:
-                    # List price (NZD only, PriceType 02 = RRP inc tax)
-                    for price_el in _findall(supply, 'Price'):
-                        price_type = _find(price_el, 'PriceType')
-                        currency = _find(price_el, 'CurrencyCode')
-                        if (price_type is not None and price_type.text == '02'
-                                and currency is not None and currency.text == 'NZD'):
-                            amount = _find(price_el, 'PriceAmount')
-                            if amount is not None and amount.text:
-                                try:
-                                    price = float(amount.text)
-                                    vals['list_price'] = math.ceil(price)
-                                except ValueError:
-                                    pass
-                            break
-                    # Vendor from supplier name
-                    supplier_name_el = _find(supply, 'Supplier/SupplierName')
-                    if supplier_name_el is not None and supplier_name_el.text:
-                        self._titlepage_set_vendor(supplier_name_el.text)
-                break
+            # Vendor from supplier name
+            if supply['supplier']:
+                vals.update(self._titlepage_vendor_vals(supply['supplier']))
+            break
 
         return vals
 
-    def _titlepage_set_vendor(self, supplier_name):
-        """Match supplier name to a res.partner and add as vendor if not already present."""
-        partner = self.env['res.partner'].search(
-            [('name', 'ilike', supplier_name)], limit=1,
-        )
+    def _titlepage_vendor_vals(self, supplier_name):
+        """Match supplier name to a res.partner and return the vals adding it as vendor if not already present."""
+        partner = self.env['book.data.supplier.alias']._resolve(supplier_name)
         if not partner:
-            _logger.info("No partner found matching Titlepage supplier: %s", supplier_name)
-            return
+            return {}
         # Check if this partner is already a vendor on the product
         if partner in self.seller_ids.mapped('partner_id'):
-            return
-        self.update({
+            return {}
+        return {
             'seller_ids': [(0, 0, {
                 'partner_id': partner.id,
                 'min_qty': 1,
             })],
-        })
+        }
@@ -12,3 +12,25 @@ class ResConfigSettings(models.TransientModel):
         string="Titlepage API Token",
         config_parameter='book_data.titlepage_api_token',
     )
+    book_data_cache_ttl_hardcover = fields.Integer(
+        string="Hardcover Cache (days)",
+        config_parameter='book_data.cache_ttl_hardcover',
+        default=30,
+    )
+    book_data_cache_ttl_titlepage = fields.Integer(
+        string="Titlepage Cache (days)",
+        config_parameter='book_data.cache_ttl_titlepage',
+        default=7,
+    )
+    book_data_cache_ttl_negative = fields.Integer(
+        string="Not Found Cache (days)",
+        config_parameter='book_data.cache_ttl_negative',
+        default=1,
+        help="How long an ISBN unknown to a provider is remembered before it is looked up again.",
+    )
+    book_data_onix_import_dir = fields.Char(
+        string="ONIX Import Directory",
+        config_parameter='book_data.onix_import_dir',
+        help="Absolute path on the server watched for ONIX feed files. "
+             "Imported files are moved to the processed/ or failed/ sub-directory.",
+    )
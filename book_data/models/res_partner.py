@@ -0,0 +1,33 @@
+import re
+import unicodedata
+
+from odoo import api, fields, models
+
+# Legal-form words ignored when comparing supplier names
+SUPPLIER_NAME_NOISE = {'ltd', 'limited', 'inc', 'llc', 'pty', 'plc', 'co', 'company', 'the'}
+
+
+def normalize_supplier_name(name):
+    """Lowercase, unaccented, punctuation-free form of a company name without its legal form.
+
+    ``"Penguin Random House (NZ) Ltd."`` becomes ``"penguin random house nz"``.
+    """
+    if not name:
+        return False
+    name = unicodedata.normalize('NFKD', name).encode('ascii', 'ignore').decode().lower()
+    words = [word for word in re.split(r'[\W_]+', name) if word and word not in SUPPLIER_NAME_NOISE]
+    return ' '.join(words) or False
+
+
+class ResPartner(models.Model):
+    _inherit = 'res.partner'
+
+    x_name_normalized = fields.Char(
+        string='Normalized Name', compute='_compute_x_name_normalized', store=True, index='trigram',
+        help="Name used to match supplier names found in book data feeds.",
+    )
+
+    @api.depends('name')
+    def _compute_x_name_normalized(self):
+        for partner in self:
+            partner.x_name_normalized = normalize_supplier_name(partner.name)
@@ -0,0 +1,2 @@
+from . import onix
+from . import provider_client
@@ -0,0 +1,200 @@
+"""Single-pass extraction of ONIX 3.x Product records.
+
+Namespaced tag names and the per-block handlers are built once per namespace
+and looked up by tag, instead of splitting paths and rebuilding tags on every
+access. ``iter_products`` streams a whole ONIX message and frees each Product
+once the caller is done with it, so memory stays flat for full catalogue feeds.
+"""
+import functools
+import types
+import xml.etree.ElementTree as ET
+
+ONIX_NS = '{http://ns.editeur.org/onix/3.1/reference}'
+
+_TAG_NAMES = (
+    'Product', 'ProductIdentifier', 'ProductIDType', 'IDValue',
+    'DescriptiveDetail', 'CollateralDetail', 'PublishingDetail', 'ProductSupply',
+    'TitleDetail', 'TitleType', 'TitleElement', 'TitleText', 'Subtitle',
+    'Contributor', 'ContributorRole', 'PersonName', 'PersonNameInverted', 'NamesBeforeKey', 'KeyNames',
+    'Measure', 'MeasureType', 'Measurement', 'MeasureUnitCode',
+    'TextContent', 'TextType', 'Text',
+    'SupportingResource', 'ResourceContentType', 'ResourceVersion', 'ResourceLink',
+    'Publisher', 'PublisherName', 'PublishingDate', 'PublishingDateRole', 'Date',
+    'Market', 'Territory', 'CountriesIncluded',
+    'SupplyDetail', 'Supplier', 'SupplierName', 'Price', 'PriceType', 'PriceAmount', 'CurrencyCode',
+)
+
+# ProductIDType codes, in order of preference
+ISBN13_ID_TYPES = ('15', '03')
+
+
+def namespace(tag):
+    """Return the ``{uri}`` prefix of a tag, or '' for a tag without namespace."""
+    return tag[:tag.index('}') + 1] if tag.startswith('{') else ''
+
+
+@functools.lru_cache(maxsize=8)
+def tags(ns=ONIX_NS):
+    """Namespaced tag names, built once per namespace."""
+    return types.SimpleNamespace(**{name: f'{ns}{name}' for name in _TAG_NAMES})
+
+
+def _text(element, tag):
+    """Stripped text of the first ``tag`` child of ``element``, or None."""
+    child = element.find(tag)
+    if child is None or not child.text:
+        return None
+    return child.text.strip() or None
+
+
+def _product_identifier(block, t, data):
+    id_type = _text(block, t.ProductIDType)
+    if id_type in ISBN13_ID_TYPES:
+        data['identifiers'].setdefault(id_type, _text(block, t.IDValue))
+
+
+def _descriptive_detail(block, t, data):
+    for child in block:
+        tag = child.tag
+        if tag == t.TitleDetail:
+            if data['title'] is None and _text(child, t.TitleType) == '01':
+                element = child.find(t.TitleElement)
+                if element is not None:
+                    data['title'] = _text(element, t.TitleText)
+                    data['subtitle'] = _text(element, t.Subtitle)
+        elif tag == t.Contributor:
+            data['contributors'].append({
+                'role': _text(child, t.ContributorRole),
+                'name': _contributor_name(child, t),
+            })
+        elif tag == t.Measure:
+            measure_type = _text(child, t.MeasureType)
+            if measure_type and measure_type not in data['measures']:
+                data['measures'][measure_type] = (_text(child, t.Measurement), _text(child, t.MeasureUnitCode))
+
+
+def _contributor_name(contributor, t):
+    name = _text(contributor, t.PersonName)
+    if name:
+        return name
+    # Fall back to PersonNameInverted ("Last, First" -> "First Last")
+    inverted = _text(contributor, t.PersonNameInverted)
+    if inverted:
+        parts = [p.strip() for p in inverted.split(',', 1)]
+        return ' '.join(reversed(parts)) if len(parts) == 2 else inverted
+    # Fall back to NamesBeforeKey + KeyNames
+    key = _text(contributor, t.KeyNames)
+    if key:
+        before = _text(contributor, t.NamesBeforeKey)
+        return f"{before} {key}" if before else key
+    return None
+
+
+def _collateral_detail(block, t, data):
+    for child in block:
+        tag = child.tag
+        if tag == t.TextContent:
+            text_type = _text(child, t.TextType)
+            if text_type and text_type not in data['texts']:
+                data['texts'][text_type] = _text(child, t.Text)
+        elif tag == t.SupportingResource:
+            # ResourceContentType 01 = front cover
+            if data['cover_url'] is None and _text(child, t.ResourceContentType) == '01':
+                version = child.find(t.ResourceVersion)
+                if version is not None:
+                    data['cover_url'] = _text(version, t.ResourceLink)
+
+
+def _publishing_detail(block, t, data):
+    for child in block:
+        tag = child.tag
+        if tag == t.Publisher:
+            if data['publisher'] is None:
+                data['publisher'] = _text(child, t.PublisherName)
+        elif tag == t.PublishingDate:
+            role = _text(child, t.PublishingDateRole)
+            if role and role not in data['dates']:
+                data['dates'][role] = _text(child, t.Date)
+
+
+def _product_supply(block, t, data):
+    supply = {'countries': None, 'supplier': None, 'prices': []}
+    for child in block:
+        tag = child.tag
+        if tag == t.Market:
+            territory = child.find(t.Territory)
+            if territory is not None:
+                supply['countries'] = _text(territory, t.CountriesIncluded)
+        elif tag == t.SupplyDetail and supply['supplier'] is None and not supply['prices']:
+            supplier = child.find(t.Supplier)
+            if supplier is not None:
+                supply['supplier'] = _text(supplier, t.SupplierName)
+            for price in child.iter(t.Price):
+                supply['prices'].append({
+                    'type': _text(price, t.PriceType),
+                    'currency': _text(price, t.CurrencyCode),
+                    'amount': _text(price, t.PriceAmount),
+                })
+    data['supplies'].append(supply)
+
+
+@functools.lru_cache(maxsize=8)
+def _handlers(ns):
+    t = tags(ns)
+    return {
+        t.ProductIdentifier: _product_identifier,
+        t.DescriptiveDetail: _descriptive_detail,
+        t.CollateralDetail: _collateral_detail,
+        t.PublishingDetail: _publishing_detail,
+        t.ProductSupply: _product_supply,
+    }
+
+
+def extract_product(product):
+    """Extract the fields we use from an ONIX ``Product`` element in one pass.
+
+    Returns a dict with ``isbn``, ``title``, ``subtitle``, ``contributors``
+    (role and resolved name), ``publisher``, ``dates`` and ``texts`` keyed by
+    role/type code, ``cover_url``, ``measures`` keyed by type as
+    ``(measurement, unit)`` and ``supplies`` (countries, supplier, prices).
+    """
+    ns = namespace(product.tag)
+    t = tags(ns)
+    handlers = _handlers(ns)
+    data = {
+        'identifiers': {},
+        'title': None,
+        'subtitle': None,
+        'contributors': [],
+        'publisher': None,
+        'dates': {},
+        'texts': {},
+        'cover_url': None,
+        'measures': {},
+        'supplies': [],
+    }
+    for block in product:
+        handler = handlers.get(block.tag)
+        if handler:
+            handler(block, t, data)
+    identifiers = data.pop('identifiers')
+    data['isbn'] = next((identifiers[k] for k in ISBN13_ID_TYPES if identifiers.get(k)), None)
+    return data
+
+
+def iter_products(source):
+    """Stream the ``Product`` elements of an ONIX message.
+
+    ``source`` is a file name or a binary file object. Each Product is
+    complete when yielded and is released as soon as the caller asks for
+    the next one, so callers must extract what they need before moving on.
+    """
+    root = None
+    for event, element in ET.iterparse(source, events=('start', 'end')):
+        if event == 'start':
+            if root is None:
+                root = element
+            continue
+        if element.tag.endswith('}Product') or element.tag == 'Product':
+            yield element
+            root.clear()
@@ -0,0 +1,214 @@
+"""Shared HTTP clients for the external book data providers.
+
+One client per provider lives for the lifetime of the worker process and
+reuses pooled keep-alive connections. Defaults can be overridden per provider
+in the Odoo configuration file, e.g. ``book_data_hardcover_rate = 0.5``.
+"""
+import logging
+import random
+import threading
+import time
+
+import requests
+from requests.adapters import HTTPAdapter
+
+from odoo.tools import config
+
+_logger = logging.getLogger(__name__)
+
+PROVIDER_DEFAULTS = {
+    # Hardcover allows 60 requests per minute per token
+    'hardcover': {'rate': 1.0, 'burst': 5},
+    'titlepage': {'rate': 10.0, 'burst': 10},
+    'covers': {'rate': 20.0, 'burst': 20},
+}
+CLIENT_DEFAULTS = {
+    'retries': 3,
+    'backoff': 0.5,             # base delay in seconds, doubled on each attempt
+    'max_backoff': 30.0,
+    'failure_threshold': 5,     # consecutive failures before the circuit opens
+    'reset_timeout': 60.0,      # seconds the circuit stays open
+    'pool_size': 10,
+}
+RETRY_STATUSES = {429, 500, 502, 503, 504}
+
+_clients = {}
+_clients_lock = threading.Lock()
+
+
+class ProviderUnavailable(requests.RequestException):
+    """Raised when a provider is skipped because its circuit breaker is open."""
+
+
+class TokenBucket:
+    """Thread-safe token bucket refilled at ``rate`` tokens per second."""
+
+    def __init__(self, rate, capacity):
+        self.rate = rate
+        self.capacity = capacity
+        self.tokens = capacity
+        self.updated = time.monotonic()
+        self.paused_until = 0.0
+        self.lock = threading.Lock()
+
+    def acquire(self, deadline=None):
+        """Take one token, waiting for it if needed. Returns False if it would pass ``deadline``."""
+        while True:
+            with self.lock:
+                now = time.monotonic()
+                self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+                self.updated = now
+                if now >= self.paused_until and self.tokens >= 1:
+                    self.tokens -= 1
+                    return True
+                wait = max(self.paused_until - now, (1 - self.tokens) / self.rate)
+            if deadline is not None and time.monotonic() + wait > deadline:
+                return False
+            time.sleep(wait)
+
+    def pause(self, seconds):
+        """Hold back every caller for ``seconds``, e.g. after a 429 response."""
+        with self.lock:
+            self.paused_until = max(self.paused_until, time.monotonic() + seconds)
+            self.tokens = 0
+
+
+class CircuitBreaker:
+    """Opens after ``threshold`` consecutive failures and lets a probe through after ``reset_timeout``.
+
+    While half-open a single request probes the provider; the others keep
+    failing fast until it succeeds. A probe that neither succeeds nor fails
+    (e.g. rate limited) frees its slot after another ``reset_timeout``.
+    """
+
+    def __init__(self, threshold, reset_timeout):
+        self.threshold = threshold
+        self.reset_timeout = reset_timeout
+        self.failures = 0
+        self.opened_at = None
+        self.probe_started_at = None
+        self.lock = threading.Lock()
+
+    def allow(self):
+        with self.lock:
+            if self.opened_at is None:
+                return True
+            now = time.monotonic()
+            if self.probe_started_at is not None and now - self.probe_started_at < self.reset_timeout:
+                return False
+            if now - self.opened_at >= self.reset_timeout:
+                # Half-open: this request is the probe
+                self.probe_started_at = now
+                return True
+            return False
+
+    def record_success(self):
+        with self.lock:
+            self.failures = 0
+            self.opened_at = None
+            self.probe_started_at = None
+
+    def record_failure(self):
+        with self.lock:
+            self.failures += 1
+            if self.probe_started_at is not None:
+                # The probe failed: stay open for another reset_timeout
+                self.probe_started_at = None
+                self.opened_at = time.monotonic()
+                return True
+            if self.failures >= self.threshold and self.opened_at is None:
+                self.opened_at = time.monotonic()
+                return True
+            return False
+
+
+class ProviderClient:
+    """Pooled, retrying and rate limited HTTP client for one provider."""
+
+    def __init__(self, name, rate, burst, retries, backoff, max_backoff,
+                 failure_threshold, reset_timeout, pool_size):
+        self.name = name
+        self.retries = retries
+        self.backoff = backoff
+        self.max_backoff = max_backoff
+        self.bucket = TokenBucket(rate, burst)
+        self.breaker = CircuitBreaker(failure_threshold, reset_timeout)
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size, max_retries=0)
+        self.session.mount('https://', adapter)
+        self.session.mount('http://', adapter)
+
+    def get(self, url, **kwargs):
+        return self.request('GET', url, **kwargs)
+
+    def post(self, url, **kwargs):
+        return self.request('POST', url, **kwargs)
+
+    def request(self, method, url, timeout=10, deadline=None, **kwargs):
+        """Send a request, retrying connection errors, timeouts, 429 and 5xx responses.
+
+        ``timeout`` applies to each attempt, ``deadline`` (a ``time.monotonic()``
+        value) bounds the whole call including rate limiting and backoff.
+        The last response is returned as is, so callers keep using
+        ``raise_for_status()``.
+        """
+        for attempt in range(self.retries + 1):
+            if not self.breaker.allow():
+                raise ProviderUnavailable(f"{self.name} is temporarily disabled after repeated failures")
+            if not self.bucket.acquire(deadline):
+                raise requests.Timeout(f"{self.name} rate limit wait exceeds the deadline")
+            last_attempt = attempt == self.retries
+            delay = min(self.max_backoff, self.backoff * 2 ** attempt) * random.uniform(0.5, 1.5)
+            try:
+                response = self.session.request(method, url, timeout=timeout, **kwargs)
+            except (requests.ConnectionError, requests.Timeout) as e:
+                self._record_failure()
+                if last_attempt or not self._can_wait(delay, deadline):
+                    raise
+                _logger.info("%s request failed (%s), retrying in %.1fs", self.name, e, delay)
+            else:
+                if response.status_code not in RETRY_STATUSES:
+                    self.breaker.record_success()
+                    return response
+                if response.status_code == 429:
+                    delay = max(delay, self._retry_after(response))
+                    self.bucket.pause(delay)
+                else:
+                    self._record_failure()
+                if last_attempt or not self._can_wait(delay, deadline):
+                    return response
+                _logger.info("%s returned HTTP %s, retrying in %.1fs", self.name, response.status_code, delay)
+            time.sleep(delay)
+
+    def _record_failure(self):
+        if self.breaker.record_failure():
+            _logger.warning("%s: too many consecutive failures, pausing requests for %ss",
+                            self.name, self.breaker.reset_timeout)
+
+    @staticmethod
+    def _can_wait(delay, deadline):
+        return deadline is None or time.monotonic() + delay < deadline
+
+    def _retry_after(self, response):
+        try:
+            return min(float(response.headers.get('Retry-After', 0)), self.max_backoff)
+        except ValueError:
+            return self.backoff
+
+
+def _setting(provider, key, default):
+    value = config.get(f'book_data_{provider}_{key}')
+    return type(default)(value) if value not in (None, '') else default
+
+
+def get_client(provider):
+    """Return the shared client for ``provider``, creating it on first use in this worker."""
+    client = _clients.get(provider)
+    if client is None:
+        with _clients_lock:
+            client = _clients.get(provider)
+            if client is None:
+                defaults = {**CLIENT_DEFAULTS, **PROVIDER_DEFAULTS.get(provider, {})}
+                settings = {key: _setting(provider, key, value) for key, value in defaults.items()}
+                client = _clients[provider] = ProviderClient(provider, **settings)
+    return client
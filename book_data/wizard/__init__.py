@@ -0,0 +1 @@
+from . import onix_import_wizard
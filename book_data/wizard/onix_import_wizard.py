@@ -0,0 +1,42 @@
+from odoo import fields, models, _
+from odoo.exceptions import UserError
+
+
+class BookDataOnixImportWizard(models.TransientModel):
+    _name = 'book.data.onix.import.wizard'
+    _description = 'Import ONIX Feed'
+
+    file = fields.Binary(string='ONIX File', required=True)
+    filename = fields.Char(string='Filename')
+    force = fields.Boolean(
+        string='Overwrite Existing Values',
+        help="Overwrite fields that are already set instead of only filling empty ones.",
+    )
+    create_missing = fields.Boolean(string='Create Missing Products', default=True)
+
+    def action_import(self):
+        """Queue the uploaded feed; it is imported in the background by the ONIX import cron."""
+        self.ensure_one()
+        if not self.file:
+            raise UserError(_('Please select an ONIX file to import.'))
+        feed = self.env['book.data.onix.import'].create({
+            'filename': self.filename or 'onix.xml',
+            'source': 'upload',
+            'force': self.force,
+            'create_missing': self.create_missing,
+        })
+        feed.attachment_id = self.env['ir.attachment'].create({
+            'name': feed.filename,
+            'type': 'binary',
+            'datas': self.file,
+            'res_model': feed._name,
+            'res_id': feed.id,
+            'mimetype': 'application/xml',
+        })
+        self.env.ref('book_data.ir_cron_book_data_onix_import')._trigger()
+        return {
+            'type': 'ir.actions.act_window',
+            'res_model': 'book.data.onix.import',
+            'view_mode': 'form',
+            'res_id': feed.id,
+        }
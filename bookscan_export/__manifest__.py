@@ -1,6 +1,6 @@
 {
     'name': 'BookScan Export',
-    'version': '0.2.2',
+    'version': '0.6.4',
     'category': 'Retail',
     'summary': 'Weekly POS sales export to Nielsen BookScan via SFTP',
     'description': """
@@ -9,6 +9,7 @@ Nielsen BookScan's SFTP server. Includes website sales with post code
 and country code when available.
     """,
     'depends': [
+        'bookstore',
         'point_of_sale',
         'sale_management',
         'website_sale',
@@ -16,6 +17,8 @@ and country code when available.
     'data': [
         'security/ir.model.access.csv',
         'data/ir_cron.xml',
+        'views/bookscan_export_log_views.xml',
+        'wizard/bookscan_backfill_wizard_views.xml',
         'views/res_config_settings_views.xml',
     ],
     'external_dependencies': {
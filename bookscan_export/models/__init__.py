@@ -1,2 +1,4 @@
 from . import bookscan_export
+from . import pos_order
 from . import res_config_settings
+from . import sale_order
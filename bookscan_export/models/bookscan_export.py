@@ -1,16 +1,41 @@
 import csv
+import heapq
 import io
+import itertools
 import logging
 import tempfile
-from datetime import timedelta
+import time
+import uuid
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from datetime import datetime, timedelta
+from operator import itemgetter
 
-import paramiko
+import pytz
 
 from odoo import api, fields, models, _
 from odoo.exceptions import UserError
+from odoo.tools import SQL
+from odoo.tools.sql import create_index
+
+from odoo.addons.bookscan_export.tools.sftp import SFTPConnection
 
 _logger = logging.getLogger(__name__)
 
+# Incremental exports stop this far behind "now" so orders still being
+# synced from the POS are picked up by the next run instead of skipped
+INCREMENTAL_LAG = timedelta(minutes=5)
+# Incremental exports look this far before the previous watermark too: write_date
+# is the start of the writing transaction, which may have committed after that
+# run. Orders already sent are skipped, so the overlap sends nothing twice.
+INCREMENTAL_OVERLAP = timedelta(hours=1)
+# Rows fetched from the database, and written out, per batch
+SALES_FETCH_BATCH = 2000
+# Backfill files generated at the same time, each holding a database connection
+BACKFILL_WORKERS = 4
+# Attempts after the first for an upload interrupted by a network error
+SFTP_RETRIES = 3
+
 
 class BookscanExportLog(models.Model):
     _name = 'bookscan.export.log'
@@ -23,10 +48,44 @@ class BookscanExportLog(models.Model):
     filename = fields.Char(string='Filename', readonly=True)
     record_count = fields.Integer(string='Records', readonly=True)
     state = fields.Selection([
+        ('pending', 'Pending'),
         ('success', 'Success'),
         ('error', 'Error'),
-    ], string='Status', readonly=True)
+    ], string='Status', readonly=True, index=True)
     error_message = fields.Text(string='Error', readonly=True)
+    mode = fields.Selection([
+        ('range', 'Date Range'),
+        ('incremental', 'Incremental'),
+    ], string='Mode', default='range', readonly=True)
+    pos_watermark = fields.Datetime(
+        string='POS Sales Up To', readonly=True,
+        help="Incremental exports: POS orders last changed up to this time (UTC) are included in this or an earlier file.",
+    )
+    web_watermark = fields.Datetime(
+        string='Website Sales Up To', readonly=True,
+        help="Incremental exports: website orders last changed up to this time (UTC) are included in this or an earlier file.",
+    )
+
+    def init(self):
+        # Partial indexes matching the export predicates, so a run only reads
+        # the orders of its own time window
+        create_index(
+            self.env.cr, 'pos_order_bookscan_date_order_index', 'pos_order', ['date_order'],
+            where="state IN ('paid', 'done')",
+        )
+        create_index(
+            self.env.cr, 'sale_order_bookscan_date_order_index', 'sale_order', ['date_order'],
+            where="state IN ('sale', 'done') AND website_id IS NOT NULL",
+        )
+        # Incremental exports select the orders changed since the previous run
+        create_index(
+            self.env.cr, 'pos_order_bookscan_write_date_index', 'pos_order', ['write_date'],
+            where="state IN ('paid', 'done')",
+        )
+        create_index(
+            self.env.cr, 'sale_order_bookscan_write_date_index', 'sale_order', ['write_date'],
+            where="state IN ('sale', 'done') AND website_id IS NOT NULL",
+        )
 
     # ---- CSV generation ----
 
@@ -34,19 +93,77 @@ class BookscanExportLog(models.Model):
         return self.env.context.get('tz') or self.env.user.tz or 'Pacific/Auckland'
 
     @api.model
-    def _get_pos_sales(self, date_from, date_to):
-        """Query POS order lines for book sales in the date range.
+    def _utc_range(self, date_from, date_to):
+        """Convert a range of local dates into naive UTC bounds ``[start, end)``."""
+        tz = pytz.timezone(self._get_tz())
+        start = tz.localize(datetime.combine(date_from, datetime.min.time()))
+        end = tz.localize(datetime.combine(date_to + timedelta(days=1), datetime.min.time()))
+        return (start.astimezone(pytz.utc).replace(tzinfo=None),
+                end.astimezone(pytz.utc).replace(tzinfo=None))
+
+    @api.model
+    def _utc_to_local(self, utc_datetime):
+        return pytz.utc.localize(utc_datetime).astimezone(pytz.timezone(self._get_tz()))
+
+    @api.model
+    def _local_date(self, utc_datetime):
+        return self._utc_to_local(utc_datetime).date()
+
+    @api.model
+    def _iter_sales(self, query):
+        """Run a sales query through a server-side cursor and yield its rows as dicts.
 
-        Returns a list of dicts ready for CSV rows.
+        Rows are fetched ``SALES_FETCH_BATCH`` at a time, so memory stays flat
+        however long the exported period is. Several of these can be consumed
+        in turn on the same database cursor.
         """
-        tz = self._get_tz()
-        self.env.cr.execute("""
+        cursor_name = SQL.identifier(f'bookscan_{uuid.uuid4().hex}')
+        self.env.cr.execute(SQL("DECLARE %s NO SCROLL CURSOR FOR %s", cursor_name, query))
+        while rows := self._fetch_sales(cursor_name):
+            yield from rows
+        self.env.cr.execute(SQL("CLOSE %s", cursor_name))
+
+    @api.model
+    def _fetch_sales(self, cursor_name):
+        self.env.cr.execute(SQL("FETCH FORWARD %s FROM %s", SALES_FETCH_BATCH, cursor_name))
+        return self.env.cr.dictfetchall()
+
+    @api.model
+    def _sales_window(self, order_alias, start, end, placed_from):
+        """Return the WHERE condition selecting the orders of an export.
+
+        Without ``placed_from``, the orders placed in ``[start, end)``. With it
+        (incremental exports), the orders changed in ``[start, end)`` that no
+        incremental export has sent yet, placed on or after ``placed_from``
+        (when not False) as earlier orders belong to full-range exports.
+        """
+        order = SQL.identifier(order_alias)
+        if placed_from is None:
+            return SQL("%s.date_order >= %s AND %s.date_order < %s", order, start, order, end)
+        condition = SQL(
+            "%s.write_date >= %s AND %s.write_date < %s AND %s.x_bookscan_log_id IS NULL",
+            order, start, order, end, order,
+        )
+        if placed_from:
+            condition = SQL("%s AND %s.date_order >= %s", condition, order, placed_from)
+        return condition
+
+    @api.model
+    def _get_pos_sales(self, start, end, placed_from=None):
+        """Stream POS order lines for book sales ordered in ``[start, end)`` (naive UTC).
+
+        See ``_sales_window`` for ``placed_from``. Yields dicts ready for CSV
+        rows, ordered by sale date.
+        """
+        return self._iter_sales(SQL("""
             SELECT
+                'pos_order'                         AS order_table,
+                po.id                               AS order_id,
                 pc.name                             AS outlet,
-                pp.barcode                          AS isbn,
+                pp.x_isbn13                         AS isbn,
                 pol.qty                             AS qty,
                 pol.price_unit                      AS price,
-                po.date_order AT TIME ZONE %s       AS sale_date,
+                po.date_order AT TIME ZONE 'UTC' AT TIME ZONE %s AS sale_date,
                 rp.zip                              AS postcode,
                 rc.code                             AS country_code
             FROM pos_order_line pol
@@ -56,25 +173,23 @@ class BookscanExportLog(models.Model):
             LEFT JOIN res_partner rp ON rp.id = po.partner_id
             LEFT JOIN res_country rc ON rc.id = rp.country_id
             WHERE po.state IN ('paid', 'done')
-              AND (po.date_order AT TIME ZONE %s)::date >= %s
-              AND (po.date_order AT TIME ZONE %s)::date <= %s
-              AND pp.barcode IS NOT NULL
-              AND pp.barcode ~ '^97[89]'
-            ORDER BY po.date_order
-        """, (tz, tz, date_from, tz, date_to))
-        return self.env.cr.dictfetchall()
+              AND %s
+              AND pp.x_isbn13 IS NOT NULL
+            ORDER BY po.date_order, pol.id
+        """, self._get_tz(), self._sales_window('po', start, end, placed_from)))
 
     @api.model
-    def _get_website_sales(self, date_from, date_to):
-        """Query confirmed website sale order lines for books in the date range."""
-        tz = self._get_tz()
-        self.env.cr.execute("""
+    def _get_website_sales(self, start, end, placed_from=None):
+        """Stream confirmed website sale order lines for books ordered in ``[start, end)`` (naive UTC)."""
+        return self._iter_sales(SQL("""
             SELECT
+                'sale_order'                        AS order_table,
+                so.id                               AS order_id,
                 'onlinestore'                       AS outlet,
-                pp.barcode                          AS isbn,
+                pp.x_isbn13                         AS isbn,
                 sol.product_uom_qty                 AS qty,
                 sol.price_unit                      AS price,
-                so.date_order AT TIME ZONE %s       AS sale_date,
+                so.date_order AT TIME ZONE 'UTC' AT TIME ZONE %s AS sale_date,
                 rp.zip                              AS postcode,
                 rc.code                             AS country_code
             FROM sale_order_line    sol
@@ -84,19 +199,33 @@ class BookscanExportLog(models.Model):
             LEFT JOIN res_country  rc  ON rc.id = rp.country_id
             WHERE so.state IN ('sale', 'done')
               AND so.website_id IS NOT NULL
-              AND (so.date_order AT TIME ZONE %s)::date >= %s
-              AND (so.date_order AT TIME ZONE %s)::date <= %s
-              AND pp.barcode IS NOT NULL
-              AND pp.barcode ~ '^97[89]'
-            ORDER BY so.date_order
-        """, (tz, tz, date_from, tz, date_to))
-        return self.env.cr.dictfetchall()
+              AND %s
+              AND pp.x_isbn13 IS NOT NULL
+            ORDER BY so.date_order, sol.id
+        """, self._get_tz(), self._sales_window('so', start, end, placed_from)))
 
     @api.model
-    def _build_csv(self, rows):
-        """Build a BookScan-format CSV string from sale rows."""
+    def _get_sales(self, pos_start, web_start, end, placed_from=None):
+        """Stream POS and website sales merged by sale date.
+
+        Returns None when there is nothing to export, otherwise an iterator of rows.
+        """
+        rows = heapq.merge(
+            self._get_pos_sales(pos_start, end, placed_from),
+            self._get_website_sales(web_start, end, placed_from),
+            key=itemgetter('sale_date'),
+        )
+        first = next(rows, None)
+        if first is None:
+            return None
+        return itertools.chain([first], rows)
+
+    @api.model
+    def _write_csv(self, rows, stream):
+        """Write sale rows in BookScan CSV format to a binary ``stream``. Returns the number of rows."""
         buf = io.StringIO()
         writer = csv.writer(buf)
+        count = 0
         for row in rows:
             sale_date = row['sale_date'].strftime('%Y%m%d')
             qty = int(row['qty'])
@@ -120,48 +249,63 @@ class BookscanExportLog(models.Model):
                     price,
                     sale_date,
                 ])
-        return buf.getvalue()
+            count += 1
+            if count % SALES_FETCH_BATCH == 0:
+                stream.write(buf.getvalue().encode('utf-8'))
+                buf.seek(0)
+                buf.truncate()
+        stream.write(buf.getvalue().encode('utf-8'))
+        return count
 
     # ---- SFTP upload ----
 
     @api.model
-    def _sftp_upload(self, filename, content):
-        """Upload CSV content to Nielsen BookScan SFTP server."""
+    def _sftp_connection(self):
+        """Return a connection to the Nielsen BookScan SFTP server, to be used as a context manager.
+
+        The connection is opened on first use and shared by every upload
+        made through it, from any thread.
+        """
         config = self.env['ir.config_parameter'].sudo()
         host = config.get_param('bookscan_export.sftp_host', '')
         port = int(config.get_param('bookscan_export.sftp_port', '22'))
         username = config.get_param('bookscan_export.sftp_username', '')
         password = config.get_param('bookscan_export.sftp_password', '')
         key_path = config.get_param('bookscan_export.sftp_key_path', '')
+        retries = int(config.get_param('bookscan_export.sftp_retries', SFTP_RETRIES))
 
         if not host or not username:
             raise UserError(_('BookScan SFTP is not configured. Go to Settings > Point of Sale > BookScan Export.'))
 
-        transport = paramiko.Transport((host, port))
-        try:
-            if key_path:
-                pkey = paramiko.RSAKey.from_private_key_file(key_path)
-                transport.connect(username=username, pkey=pkey)
-            else:
-                transport.connect(username=username, password=password)
-
-            sftp = paramiko.SFTPClient.from_transport(transport)
-            try:
-                with tempfile.NamedTemporaryFile(mode='w', suffix='.csv', delete=False) as tmp:
-                    tmp.write(content)
-                    tmp.flush()
-                    sftp.put(tmp.name, filename)
-                _logger.info("BookScan: uploaded %s to %s", filename, host)
-            finally:
-                sftp.close()
-        finally:
-            transport.close()
+        return SFTPConnection(host, port, username, password=password, key_path=key_path, retries=retries)
+
+    @api.model
+    def _sftp_upload(self, connection, filename, rows):
+        """Write sale rows as CSV to a local temporary file and upload it. Returns the number of rows written.
+
+        The file is generated once: a retried upload resumes from it rather
+        than querying the rows again.
+        """
+        with tempfile.TemporaryFile() as content:
+            count = self._write_csv(rows, content)
+            connection.upload(filename, content)
+        _logger.info("BookScan: uploaded %s (%s rows) to %s", filename, count, connection.host)
+        return count
 
     # ---- Main entry point ----
 
     @api.model
     def _cron_export(self):
-        """Scheduled action: export last 7 days of sales to BookScan."""
+        """Scheduled action: export new sales to BookScan.
+
+        In incremental mode only the orders placed since the previous
+        successful export are sent; otherwise the last 7 days are re-sent.
+        """
+        config = self.env['ir.config_parameter'].sudo()
+        if config.get_param('bookscan_export.mode', 'range') == 'incremental':
+            self._run_incremental_export()
+            return
+
         today = fields.Date.context_today(self)
         date_to = today - timedelta(days=1)
         date_from = today - timedelta(days=7)
@@ -169,46 +313,183 @@ class BookscanExportLog(models.Model):
         self._run_export(date_from, date_to)
 
     @api.model
-    def _run_export(self, date_from, date_to):
-        """Generate CSV and upload for the given date range."""
+    def _get_filename(self, date_to, suffix=''):
         config = self.env['ir.config_parameter'].sudo()
         outlet_name = config.get_param('bookscan_export.outlet_name', 'booksandco')
+        return f"{outlet_name}{date_to.strftime('%Y%m%d')}{suffix}.csv"
+
+    @api.model
+    def _run_export(self, date_from, date_to):
+        """Generate CSV and upload for the given date range."""
+        start, end = self._utc_range(date_from, date_to)
+        self._export(start, start, end, {
+            'date_from': date_from,
+            'date_to': date_to,
+            'filename': self._get_filename(date_to),
+        })
+
+    @api.model
+    def _run_incremental_export(self):
+        """Generate CSV and upload the sales changed since the last incremental export.
+
+        Orders are selected on ``write_date``, so orders synced or paid late
+        are still picked up, and each source resumes from its own high-water
+        mark. The run time depends on the number of changed orders only. The
+        marks only move forward when the upload succeeds, so a failed run is
+        retried by the next one; the orders sent are flagged so they are not
+        sent again when they change afterwards.
+        """
+        # Orders placed before the day after the last full-range export were sent by it
+        last_range = self.search([('mode', '=', 'range'), ('state', '=', 'success')], order='date_to desc', limit=1)
+        placed_from = False
+        if last_range:
+            placed_from = self._utc_range(last_range.date_to + timedelta(days=1), last_range.date_to)[0]
+        last = self.search([('mode', '=', 'incremental'), ('state', '=', 'success')], order='id desc', limit=1)
+        if last:
+            pos_start = last.pos_watermark - INCREMENTAL_OVERLAP
+            web_start = last.web_watermark - INCREMENTAL_OVERLAP
+        elif placed_from:
+            pos_start = web_start = placed_from
+        else:
+            today = fields.Date.context_today(self)
+            pos_start = web_start = self._utc_range(today - timedelta(days=7), today)[0]
+        end = fields.Datetime.now() - INCREMENTAL_LAG
+        date_to = self._local_date(end)
 
-        pos_rows = self._get_pos_sales(date_from, date_to)
-        web_rows = self._get_website_sales(date_from, date_to)
-        all_rows = pos_rows + web_rows
+        # Timestamped, so files never collide with each other or with the full-range file of the day
+        suffix = self._utc_to_local(end).strftime('%H%M%S')
+        self._export(pos_start, web_start, end, {
+            'mode': 'incremental',
+            'date_from': self._local_date(min(pos_start, web_start)),
+            'date_to': date_to,
+            'filename': self._get_filename(date_to, suffix),
+            'pos_watermark': end,
+            'web_watermark': end,
+        }, placed_from=placed_from)
+
+    @api.model
+    def _export(self, pos_start, web_start, end, log_vals, placed_from=None):
+        """Export POS sales from ``pos_start`` and website sales from ``web_start`` up to ``end``, and log it.
+
+        See ``_sales_window`` for ``placed_from``.
+        """
+        log = self.create({**log_vals, 'state': 'pending'})
+        log._upload(pos_start, web_start, end, placed_from=placed_from)
+        return log
 
-        filename = f"{outlet_name}{date_to.strftime('%Y%m%d')}.csv"
+    def _upload(self, pos_start, web_start, end, connection=None, placed_from=None):
+        """Generate and upload the file of this log entry, recording the outcome on it.
 
-        if not all_rows:
-            _logger.info("BookScan: no book sales for %s – %s, skipping upload.", date_from, date_to)
-            self.create({
-                'date_from': date_from,
-                'date_to': date_to,
-                'filename': filename,
+        ``connection`` reuses an open SFTP connection instead of opening one.
+        Incremental exports (``placed_from`` given) flag the orders they sent.
+        """
+        self.ensure_one()
+        rows = self._get_sales(pos_start, web_start, end, placed_from)
+
+        if rows is None:
+            _logger.info("BookScan: no book sales for %s – %s, skipping upload.", self.date_from, self.date_to)
+            self.write({
+                'export_date': fields.Datetime.now(),
                 'record_count': 0,
                 'state': 'success',
             })
             return
 
-        csv_content = self._build_csv(all_rows)
+        sent_orders = defaultdict(set)
+
+        def track(rows):
+            for row in rows:
+                sent_orders[row['order_table']].add(row['order_id'])
+                yield row
 
         try:
-            self._sftp_upload(filename, csv_content)
-            self.create({
-                'date_from': date_from,
-                'date_to': date_to,
-                'filename': filename,
-                'record_count': len(all_rows),
+            # A database error while streaming must not abort the transaction holding the log
+            with self.env.cr.savepoint():
+                if connection:
+                    record_count = self._sftp_upload(connection, self.filename, track(rows))
+                else:
+                    with self._sftp_connection() as connection:
+                        record_count = self._sftp_upload(connection, self.filename, track(rows))
+            if placed_from is not None:
+                self._mark_sent(sent_orders)
+            self.write({
+                'export_date': fields.Datetime.now(),
+                'record_count': record_count,
                 'state': 'success',
             })
         except Exception as e:
-            _logger.exception("BookScan export failed")
-            self.create({
-                'date_from': date_from,
-                'date_to': date_to,
-                'filename': filename,
-                'record_count': len(all_rows),
+            _logger.exception("BookScan export of %s failed", self.filename)
+            self.write({
+                'export_date': fields.Datetime.now(),
                 'state': 'error',
                 'error_message': str(e),
             })
+
+    def _mark_sent(self, sent_orders):
+        """Flag the orders of ``sent_orders`` ({table: ids}) as sent by this incremental export.
+
+        Done in SQL so that ``write_date`` is left alone and the orders are not
+        picked up again as changed.
+        """
+        self.ensure_one()
+        for table, model in (('pos_order', 'pos.order'), ('sale_order', 'sale.order')):
+            order_ids = list(sent_orders.get(table, ()))
+            if not order_ids:
+                continue
+            self.env.cr.execute(SQL(
+                "UPDATE %s SET x_bookscan_log_id = %s WHERE id = ANY(%s)",
+                SQL.identifier(table), self.id, order_ids,
+            ))
+            self.env[model].browse(order_ids).invalidate_recordset(['x_bookscan_log_id'])
+
+    # ---- Backfill ----
+
+    @api.model
+    def _queue_backfill(self, date_from, date_to):
+        """Split a date range into weekly files queued for the backfill cron. Returns the queued logs."""
+        vals_list = []
+        week_start = date_from
+        while week_start <= date_to:
+            week_end = min(week_start + timedelta(days=6), date_to)
+            vals_list.append({
+                'date_from': week_start,
+                'date_to': week_end,
+                'filename': self._get_filename(week_end),
+                'state': 'pending',
+            })
+            week_start = week_end + timedelta(days=1)
+        logs = self.create(vals_list)
+        self.env.ref('bookscan_export.ir_cron_bookscan_backfill')._trigger()
+        return logs
+
+    @api.model
+    def _cron_backfill(self):
+        """Scheduled action: generate and upload the queued backfill files.
+
+        Files are built in parallel, each worker on its own database cursor,
+        and all uploads share one SSH connection. Each file is committed to
+        the log as soon as it is done.
+        """
+        logs = self.search([('state', '=', 'pending'), ('mode', '=', 'range')], order='date_from')
+        if not logs:
+            return
+        config = self.env['ir.config_parameter'].sudo()
+        workers = max(1, int(config.get_param('bookscan_export.backfill_workers', BACKFILL_WORKERS)))
+        start = time.monotonic()
+        done = 0
+        with self._sftp_connection() as connection, \
+                ThreadPoolExecutor(max_workers=workers, thread_name_prefix='bookscan') as executor:
+            futures = [executor.submit(self._backfill_job, log.id, connection) for log in logs]
+            for future in as_completed(futures):
+                future.result()
+                done += 1
+                self.env['ir.cron']._notify_progress(done=done, remaining=len(logs) - done)
+        self.env.cr.commit()
+        _logger.info("BookScan backfill: %s files in %.1fs", done, time.monotonic() - start)
+
+    def _backfill_job(self, log_id, connection):
+        """Worker: export one queued log entry on a dedicated cursor, committed on success."""
+        with self.pool.cursor() as cr:
+            log = self.with_env(self.env(cr=cr)).browse(log_id)
+            start, end = log._utc_range(log.date_from, log.date_to)
+            log._upload(start, start, end, connection=connection)
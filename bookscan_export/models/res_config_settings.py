@@ -1,7 +1,8 @@
-import base64
+import io
 from datetime import timedelta
 
-from odoo import fields, models
+from odoo import fields, models, _
+from odoo.exceptions import UserError
 
 
 class ResConfigSettings(models.TransientModel):
@@ -35,6 +36,29 @@ class ResConfigSettings(models.TransientModel):
         default='booksandco',
         help="Used in the export filename, e.g. booksandco20260227.csv",
     )
+    bookscan_export_mode = fields.Selection(
+        [('range', 'Last 7 Days'), ('incremental', 'New Sales Only')],
+        string="Export Mode",
+        config_parameter='bookscan_export.mode',
+        default='range',
+        help="New Sales Only sends the orders placed since the previous successful export.",
+    )
+    bookscan_export_interval = fields.Selection(
+        [('weeks', 'Weekly'), ('days', 'Daily'), ('hours', 'Hourly')],
+        string="Export Frequency",
+        config_parameter='bookscan_export.interval',
+        default='weeks',
+        help="Hourly exports are only available with New Sales Only.",
+    )
+
+    def set_values(self):
+        if self.bookscan_export_interval == 'hours' and self.bookscan_export_mode != 'incremental':
+            raise UserError(_("Hourly BookScan exports need the New Sales Only mode: "
+                              "the Last 7 Days mode would send the same week of sales every hour."))
+        super().set_values()
+        cron = self.env.ref('bookscan_export.ir_cron_bookscan_export', raise_if_not_found=False)
+        if cron and cron.interval_type != self.bookscan_export_interval:
+            cron.sudo().write({'interval_number': 1, 'interval_type': self.bookscan_export_interval})
 
     def _bookscan_export_date_range(self):
         today = fields.Date.context_today(self)
@@ -45,20 +69,18 @@ class ResConfigSettings(models.TransientModel):
         date_from, date_to = self._bookscan_export_date_range()
 
         export_model = self.env['bookscan.export.log']
-        config = self.env['ir.config_parameter'].sudo()
-        outlet_name = config.get_param('bookscan_export.outlet_name', 'booksandco')
-        filename = f"{outlet_name}{date_to.strftime('%Y%m%d')}.csv"
-
-        pos_rows = export_model._get_pos_sales(date_from, date_to)
-        web_rows = export_model._get_website_sales(date_from, date_to)
-        all_rows = pos_rows + web_rows
+        filename = export_model._get_filename(date_to)
 
-        csv_content = export_model._build_csv(all_rows) if all_rows else ''
+        start, end = export_model._utc_range(date_from, date_to)
+        content = io.BytesIO()
+        rows = export_model._get_sales(start, start, end)
+        if rows is not None:
+            export_model._write_csv(rows, content)
 
         attachment = self.env['ir.attachment'].create({
             'name': filename,
             'type': 'binary',
-            'datas': base64.b64encode(csv_content.encode('utf-8')),
+            'raw': content.getvalue(),
             'mimetype': 'text/csv',
         })
 
@@ -0,0 +1,11 @@
+from odoo import fields, models
+
+
+class SaleOrder(models.Model):
+    _inherit = 'sale.order'
+
+    x_bookscan_log_id = fields.Many2one(
+        'bookscan.export.log', string='BookScan Export', readonly=True, copy=False,
+        index='btree_not_null', ondelete='set null',
+        help="Incremental BookScan export that sent this order; it is not sent again when it changes later.",
+    )
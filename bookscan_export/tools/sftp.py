@@ -0,0 +1,150 @@
+"""Reusable SFTP connection for BookScan uploads.
+
+One authenticated SSH transport is kept for all the files of an export run
+and re-established transparently if it drops. Private keys are parsed once
+per worker process, whatever their type, and failed uploads are retried with
+exponential backoff, resuming after the bytes already on the server. Files
+are uploaded under a temporary name and renamed once complete.
+"""
+import logging
+import os
+import shutil
+import threading
+import time
+
+import paramiko
+
+_logger = logging.getLogger(__name__)
+
+# Tried in order when loading a private key file
+KEY_TYPES = (paramiko.Ed25519Key, paramiko.ECDSAKey, paramiko.RSAKey)
+RETRY_ERRORS = (paramiko.SSHException, EOFError, OSError)
+KEEPALIVE_INTERVAL = 30
+UPLOAD_CHUNK_SIZE = 32768
+PARTIAL_SUFFIX = '.part'
+
+_keys = {}
+_keys_lock = threading.Lock()
+
+
+def load_key(path, password=None):
+    """Return the parsed private key at ``path``, cached until the file changes."""
+    mtime = os.stat(path).st_mtime
+    with _keys_lock:
+        cached = _keys.get(path)
+        if cached and cached[0] == mtime:
+            return cached[1]
+        error = None
+        for key_class in KEY_TYPES:
+            try:
+                key = key_class.from_private_key_file(path, password=password)
+                break
+            except paramiko.SSHException as e:
+                error = e
+        else:
+            raise paramiko.SSHException(f"Unsupported or invalid private key {path}: {error}")
+        _keys[path] = (mtime, key)
+        return key
+
+
+class SFTPConnection:
+    """Lazily connected SSH transport shared by several uploads, including from several threads."""
+
+    def __init__(self, host, port, username, password=None, key_path=None, retries=3, backoff=2.0):
+        self.host = host
+        self.port = port
+        self.username = username
+        self.password = password
+        self.key_path = key_path
+        self.retries = retries
+        self.backoff = backoff
+        self._transport = None
+        self._lock = threading.Lock()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def close(self):
+        with self._lock:
+            if self._transport is not None:
+                self._transport.close()
+                self._transport = None
+
+    @property
+    def transport(self):
+        """The authenticated transport, (re)connecting when there is none or it dropped."""
+        with self._lock:
+            if self._transport is None or not self._transport.is_active():
+                if self._transport is not None:
+                    self._transport.close()
+                self._transport = self._connect()
+            return self._transport
+
+    def _connect(self):
+        transport = paramiko.Transport((self.host, self.port))
+        try:
+            if self.key_path:
+                transport.connect(username=self.username, pkey=load_key(self.key_path))
+            else:
+                transport.connect(username=self.username, password=self.password)
+        except Exception:
+            transport.close()
+            raise
+        transport.set_keepalive(KEEPALIVE_INTERVAL)
+        return transport
+
+    def upload(self, filename, content):
+        """Upload the binary file object ``content`` to the remote ``filename``.
+
+        The data goes to ``filename`` + ``PARTIAL_SUFFIX`` first, renamed once
+        complete, so the server never sees a truncated file under the final
+        name. When an attempt fails, the next one appends to the partial file
+        from the matching offset of ``content``.
+        """
+        partial = filename + PARTIAL_SUFFIX
+        size = content.seek(0, os.SEEK_END)
+        for attempt in range(self.retries + 1):
+            try:
+                sftp = paramiko.SFTPClient.from_transport(self.transport)
+                try:
+                    offset = self._remote_size(sftp, partial) if attempt else 0
+                    if offset > size:
+                        offset = 0
+                    content.seek(offset)
+                    with sftp.open(partial, 'ab' if offset else 'wb') as remote:
+                        # Don't wait for the server to acknowledge each write
+                        remote.set_pipelined(True)
+                        shutil.copyfileobj(content, remote, UPLOAD_CHUNK_SIZE)
+                    self._rename(sftp, partial, filename)
+                    return
+                finally:
+                    sftp.close()
+            except RETRY_ERRORS as e:
+                if attempt == self.retries:
+                    raise
+                delay = self.backoff * 2 ** attempt
+                _logger.warning("SFTP upload of %s to %s failed (%s), retrying in %.0fs",
+                                filename, self.host, e, delay)
+                time.sleep(delay)
+
+    @staticmethod
+    def _rename(sftp, source, target):
+        """Rename ``source`` to ``target``, replacing it, on servers with or without posix-rename."""
+        try:
+            sftp.posix_rename(source, target)
+        except OSError:
+            try:
+                sftp.remove(target)
+            except FileNotFoundError:
+                pass
+            sftp.rename(source, target)
+
+    @staticmethod
+    def _remote_size(sftp, filename):
+        try:
+            return sftp.stat(filename).st_size or 0
+        except FileNotFoundError:
+            return 0
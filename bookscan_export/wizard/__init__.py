@@ -0,0 +1 @@
+from . import bookscan_backfill_wizard
@@ -0,0 +1,24 @@
+from odoo import fields, models, _
+from odoo.exceptions import UserError
+
+
+class BookscanBackfillWizard(models.TransientModel):
+    _name = 'bookscan.backfill.wizard'
+    _description = 'BookScan Backfill'
+
+    date_from = fields.Date(string='From', required=True)
+    date_to = fields.Date(string='To', required=True)
+
+    def action_backfill(self):
+        """Queue one file per week of the range; they are uploaded in the background by the backfill cron."""
+        self.ensure_one()
+        if self.date_from > self.date_to:
+            raise UserError(_('The start date must be before the end date.'))
+        logs = self.env['bookscan.export.log']._queue_backfill(self.date_from, self.date_to)
+        return {
+            'type': 'ir.actions.act_window',
+            'name': _('BookScan Backfill'),
+            'res_model': 'bookscan.export.log',
+            'view_mode': 'list',
+            'domain': [('id', 'in', logs.ids)],
+        }
@@ -1,6 +1,6 @@
 {
     'name': 'Bookstore',
-    'version': '1.13.5',
+    'version': '1.20.5',
     'category': 'Retail',
     'depends': [
         'account',
@@ -40,12 +40,16 @@
         'website_sale_stock',
     ],
     'data': [
+        'security/ir.model.access.csv',
         'data/ir_default.xml',
         'data/res_config_settings.xml',
         'data/stock_warehouse.xml',
         'data/ir_attachment_pre.xml',
         'data/ir_model_fields.xml',
         'data/ir_ui_view.xml',
+        'views/book_author_views.xml',
+        'views/purchase_order_line_views.xml',
+        'wizard/product_reprice_wizard_views.xml',
         'data/base_automation.xml',
         'data/ir_actions_server.xml',
         'data/pos_category.xml',
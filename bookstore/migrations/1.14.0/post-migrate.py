@@ -0,0 +1,52 @@
+"""Split the existing x_author and x_publisher strings into book.author and book.publisher records.
+
+Done in SQL so the whole catalogue is converted in a few statements. The
+name normalization matches ``normalize_name`` in models/book_author.py.
+"""
+
+
+def migrate(cr, version):
+    cr.execute("""
+        CREATE TEMPORARY TABLE book_author_split ON COMMIT DROP AS
+        SELECT pt.id AS product_tmpl_id,
+               regexp_replace(trim(n.name), '\\s+', ' ', 'g') AS name
+        FROM product_template pt,
+             unnest(regexp_split_to_array(pt.x_author, '\\s*[,;]\\s*')) AS n(name)
+        WHERE pt.x_author IS NOT NULL
+    """)
+    cr.execute("DELETE FROM book_author_split WHERE name = ''")
+    cr.execute("""
+        INSERT INTO book_author (name, name_normalized, create_uid, create_date, write_uid, write_date)
+        SELECT DISTINCT ON (lower(name)) name, lower(name), 1, now() AT TIME ZONE 'UTC', 1, now() AT TIME ZONE 'UTC'
+        FROM book_author_split
+        ORDER BY lower(name), product_tmpl_id
+        ON CONFLICT (name_normalized) DO NOTHING
+    """)
+    cr.execute("""
+        INSERT INTO book_author_product_template_rel (product_tmpl_id, author_id)
+        SELECT DISTINCT s.product_tmpl_id, a.id
+        FROM book_author_split s
+        JOIN book_author a ON a.name_normalized = lower(s.name)
+        ON CONFLICT DO NOTHING
+    """)
+
+    cr.execute("""
+        INSERT INTO book_publisher (name, name_normalized, create_uid, create_date, write_uid, write_date)
+        SELECT DISTINCT ON (lower(name)) name, lower(name), 1, now() AT TIME ZONE 'UTC', 1, now() AT TIME ZONE 'UTC'
+        FROM (
+            SELECT id, regexp_replace(trim(x_publisher), '\\s+', ' ', 'g') AS name
+            FROM product_template
+            WHERE x_publisher IS NOT NULL
+        ) p
+        WHERE name != ''
+        ORDER BY lower(name), id
+        ON CONFLICT (name_normalized) DO NOTHING
+    """)
+    cr.execute("""
+        UPDATE product_template pt
+        SET x_publisher_id = bp.id
+        FROM book_publisher bp
+        WHERE pt.x_publisher IS NOT NULL
+          AND bp.name_normalized = lower(regexp_replace(trim(pt.x_publisher), '\\s+', ' ', 'g'))
+          AND pt.x_publisher_id IS DISTINCT FROM bp.id
+    """)
@@ -0,0 +1,17 @@
+"""Backfill the stored x_last_sale_date from the done deliveries, in one statement."""
+
+
+def migrate(cr, version):
+    cr.execute("""
+        UPDATE product_template pt
+        SET x_last_sale_date = s.sale_date
+        FROM (
+            SELECT pp.product_tmpl_id, max(sm.date)::date AS sale_date
+            FROM stock_move sm
+            JOIN stock_picking_type spt ON spt.id = sm.picking_type_id
+            JOIN product_product pp ON pp.id = sm.product_id
+            WHERE spt.code = 'outgoing' AND sm.state = 'done'
+            GROUP BY pp.product_tmpl_id
+        ) s
+        WHERE pt.id = s.product_tmpl_id
+    """)
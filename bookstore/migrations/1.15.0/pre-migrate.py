@@ -0,0 +1,17 @@
+"""x_last_sale_date moves from a computed Studio field to a stored Python field.
+
+Detach the old ``ir.model.fields`` record from its XML id first, otherwise
+removing the record from the data files would drop the new column.
+"""
+
+
+def migrate(cr, version):
+    cr.execute("""
+        DELETE FROM ir_model_data
+        WHERE module = 'bookstore' AND name = 'x_last_sale_date_field'
+    """)
+    cr.execute("""
+        UPDATE ir_model_fields
+        SET state = 'base', compute = NULL, depends = NULL, store = true
+        WHERE model = 'product.template' AND name = 'x_last_sale_date'
+    """)
@@ -0,0 +1,42 @@
+"""x_last_vendor and x_isbn move from related Studio fields to stored Python fields.
+
+Detach the old ``ir.model.fields`` records from their XML ids so removing
+them from the data files does not drop the new columns, then create and
+fill the columns in SQL so the upgrade does not recompute every product
+and purchase line through the ORM.
+"""
+
+
+def migrate(cr, version):
+    cr.execute("""
+        DELETE FROM ir_model_data
+        WHERE module = 'bookstore' AND name IN ('x_last_vendor_template_field', 'x_isbn_barcode_field')
+    """)
+    cr.execute("""
+        UPDATE ir_model_fields
+        SET state = 'base', related = NULL, store = true
+        WHERE (model = 'product.template' AND name = 'x_last_vendor')
+           OR (model = 'purchase.order.line' AND name = 'x_isbn')
+    """)
+
+    cr.execute("ALTER TABLE product_template ADD COLUMN IF NOT EXISTS x_last_vendor int4")
+    # Same order as ProductTemplate._compute_x_last_vendor
+    cr.execute("""
+        UPDATE product_template pt
+        SET x_last_vendor = s.partner_id
+        FROM (
+            SELECT DISTINCT ON (product_tmpl_id) product_tmpl_id, partner_id
+            FROM product_supplierinfo
+            WHERE product_tmpl_id IS NOT NULL
+            ORDER BY product_tmpl_id, date_end IS NOT NULL, sequence, date_start DESC NULLS LAST, id
+        ) s
+        WHERE pt.id = s.product_tmpl_id
+    """)
+
+    cr.execute("ALTER TABLE purchase_order_line ADD COLUMN IF NOT EXISTS x_isbn varchar")
+    cr.execute("""
+        UPDATE purchase_order_line pol
+        SET x_isbn = pp.barcode
+        FROM product_product pp
+        WHERE pp.id = pol.product_id AND pp.barcode IS NOT NULL
+    """)
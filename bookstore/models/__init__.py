@@ -1,2 +1,8 @@
+from . import book_author
+from . import book_publisher
+from . import product_product
 from . import product_template
+from . import purchase_order_line
 from . import sale_order
+from . import stock_move
+from . import stock_picking
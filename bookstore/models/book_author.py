@@ -0,0 +1,85 @@
+import re
+
+from odoo import api, fields, models
+
+# Separators between names in the x_author string, as written by the book data parsers
+AUTHOR_SEPARATOR_RE = re.compile(r'\s*[,;]\s*')
+
+
+def normalize_name(name):
+    """Lowercase, single-spaced form of an author or publisher name, used to match them.
+
+    Kept equivalent to ``lower(regexp_replace(trim(name), '\\s+', ' ', 'g'))``
+    in the 1.14.0 migration.
+    """
+    return ' '.join((name or '').split()).lower()
+
+
+def split_authors(text):
+    """Names of a comma (or semicolon) separated author string, in order and without duplicates."""
+    names = {}
+    for name in AUTHOR_SEPARATOR_RE.split(text or ''):
+        name = ' '.join(name.split())
+        if name:
+            names.setdefault(normalize_name(name), name)
+    return list(names.values())
+
+
+class BookAuthor(models.Model):
+    _name = 'book.author'
+    _description = 'Author'
+    _order = 'name'
+
+    name = fields.Char(string='Name', required=True)
+    name_normalized = fields.Char(
+        string='Normalized Name', compute='_compute_name_normalized', store=True, readonly=True,
+    )
+    product_ids = fields.Many2many(
+        'product.template', 'book_author_product_template_rel', 'author_id', 'product_tmpl_id', string='Books',
+    )
+    product_count = fields.Integer(string='Books', compute='_compute_product_count')
+
+    _sql_constraints = [
+        ('name_normalized_uniq', 'unique(name_normalized)', 'This author already exists.'),
+    ]
+
+    @api.depends('name')
+    def _compute_name_normalized(self):
+        for author in self:
+            author.name_normalized = normalize_name(author.name)
+
+    def _compute_product_count(self):
+        # One grouped query on the indexed relation table
+        counts = dict(self.env['product.template']._read_group(
+            [('x_author_ids', 'in', self.ids)], ['x_author_ids'], ['__count'],
+        ))
+        for author in self:
+            author.product_count = counts.get(author, 0)
+
+    @api.model
+    def _resolve(self, names, create=True):
+        """Return the authors named ``names``, in the same order, creating the missing ones.
+
+        With ``create`` False nothing is created (e.g. in an onchange) and
+        None is returned when any of them does not exist yet.
+        """
+        keys = {normalize_name(name): name for name in names if normalize_name(name)}
+        if not keys:
+            return self.browse()
+        authors = {
+            author.name_normalized: author
+            for author in self.sudo().search([('name_normalized', 'in', list(keys))])
+        }
+        missing = [name for key, name in keys.items() if key not in authors]
+        if missing and not create:
+            return None
+        for author in self.sudo().create([{'name': name} for name in missing]):
+            authors[author.name_normalized] = author
+        return self.browse([authors[key].id for key in keys])
+
+    def action_view_products(self):
+        self.ensure_one()
+        action = self.env['ir.actions.act_window']._for_xml_id('product.product_template_action')
+        action['domain'] = [('x_author_ids', 'in', self.ids)]
+        action['context'] = {}
+        return action
@@ -0,0 +1,56 @@
+from odoo import api, fields, models
+
+from .book_author import normalize_name
+
+
+class BookPublisher(models.Model):
+    _name = 'book.publisher'
+    _description = 'Publisher'
+    _order = 'name'
+
+    name = fields.Char(string='Name', required=True)
+    name_normalized = fields.Char(
+        string='Normalized Name', compute='_compute_name_normalized', store=True, readonly=True,
+    )
+    product_ids = fields.One2many('product.template', 'x_publisher_id', string='Books')
+    product_count = fields.Integer(string='Books', compute='_compute_product_count')
+
+    _sql_constraints = [
+        ('name_normalized_uniq', 'unique(name_normalized)', 'This publisher already exists.'),
+    ]
+
+    @api.depends('name')
+    def _compute_name_normalized(self):
+        for publisher in self:
+            publisher.name_normalized = normalize_name(publisher.name)
+
+    def _compute_product_count(self):
+        counts = dict(self.env['product.template']._read_group(
+            [('x_publisher_id', 'in', self.ids)], ['x_publisher_id'], ['__count'],
+        ))
+        for publisher in self:
+            publisher.product_count = counts.get(publisher, 0)
+
+    @api.model
+    def _resolve(self, name, create=True):
+        """Return the publisher named ``name``, creating it if needed, or an empty recordset.
+
+        With ``create`` False nothing is created (e.g. in an onchange) and
+        None is returned when it does not exist yet.
+        """
+        key = normalize_name(name)
+        if not key:
+            return self.browse()
+        publisher = self.sudo().search([('name_normalized', '=', key)], limit=1)
+        if not publisher:
+            if not create:
+                return None
+            publisher = self.sudo().create({'name': ' '.join(name.split())})
+        return self.browse(publisher.id)
+
+    def action_view_products(self):
+        self.ensure_one()
+        action = self.env['ir.actions.act_window']._for_xml_id('product.product_template_action')
+        action['domain'] = [('x_publisher_id', '=', self.id)]
+        action['context'] = {'default_x_publisher_id': self.id}
+        return action
@@ -0,0 +1,17 @@
+from odoo import api, fields, models
+
+from odoo.addons.bookstore.tools.isbn import to_isbn13
+
+
+class ProductProduct(models.Model):
+    _inherit = 'product.product'
+
+    x_isbn13 = fields.Char(
+        string='ISBN-13', compute='_compute_x_isbn13', store=True, index='btree_not_null',
+        help="Checksum-validated ISBN-13 of the barcode, converted from ISBN-10 if needed. Empty for non-books.",
+    )
+
+    @api.depends('barcode')
+    def _compute_x_isbn13(self):
+        for product in self:
+            product.x_isbn13 = to_isbn13(product.barcode)
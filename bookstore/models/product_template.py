@@ -1,12 +1,143 @@
-from odoo import api, fields, models
+from datetime import date
+
+from odoo import api, fields, models, Command
+from odoo.tools import SQL, float_round, split_every
+from odoo.tools.sql import create_index
+
+from odoo.addons.bookstore.tools.isbn import to_isbn13
+
+from .book_author import split_authors
+
+# Products repriced per UPDATE statement
+REPRICE_CHUNK_SIZE = 1000
 
 
 class ProductTemplate(models.Model):
     _inherit = 'product.template'
 
-    x_is_isbn = fields.Boolean(compute='_compute_is_isbn')
+    x_is_isbn = fields.Boolean(compute='_compute_is_isbn', store=True)
+    # x_author and x_publisher stay the display strings; these are kept in sync with them
+    x_author_ids = fields.Many2many(
+        'book.author', 'book_author_product_template_rel', 'product_tmpl_id', 'author_id', string='Authors',
+    )
+    x_publisher_id = fields.Many2one('book.publisher', string='Publisher Record', index=True, ondelete='restrict')
+    x_last_vendor = fields.Many2one(
+        'res.partner', string='Last Vendor', compute='_compute_x_last_vendor', store=True, index=True,
+        help="Current vendor: the first vendor line without an end date, by sequence then latest start date.",
+    )
+    x_last_sale_date = fields.Date(
+        string='Last Sale', readonly=True, copy=False, index=True,
+        help="Date of the latest done delivery of this product, kept up to date as deliveries are validated.",
+    )
+
+    def init(self):
+        super().init()
+        # Partial index: searches for books read only the ISBN products
+        create_index(self.env.cr, 'product_template_x_is_isbn_index', self._table, ['id'], where='x_is_isbn')
 
     @api.depends('barcode')
     def _compute_is_isbn(self):
         for rec in self:
-            rec.x_is_isbn = bool(rec.barcode and rec.barcode.startswith(('978', '979')))
+            rec.x_is_isbn = bool(to_isbn13(rec.barcode))
+
+    @api.depends('seller_ids.partner_id', 'seller_ids.sequence', 'seller_ids.date_start', 'seller_ids.date_end')
+    def _compute_x_last_vendor(self):
+        # Same order as the 1.19.0 migration backfill
+        for template in self:
+            sellers = template.seller_ids.filtered(lambda s: not s.date_end) or template.seller_ids
+            template.x_last_vendor = sellers.sorted(
+                lambda s: (s.sequence, -(s.date_start or date.min).toordinal(), s.id)
+            )[:1].partner_id
+
+    def _update_last_sale_date(self, dates):
+        """Move ``x_last_sale_date`` forward to ``dates`` ({template id: date}) where it is older."""
+        if not dates:
+            return
+        # Set-based and never backwards, so concurrent deliveries cannot overwrite a later date
+        self.env.cr.execute(SQL("""
+            UPDATE product_template pt
+            SET x_last_sale_date = v.sale_date
+            FROM (VALUES %s) AS v(id, sale_date)
+            WHERE pt.id = v.id
+              AND (pt.x_last_sale_date IS NULL OR pt.x_last_sale_date < v.sale_date)
+        """, SQL(', ').join(SQL('(%s, %s::date)', tmpl_id, date) for tmpl_id, date in dates.items())))
+        self.browse(list(dates)).invalidate_recordset(['x_last_sale_date'])
+
+    @api.model
+    def _bulk_reprice(self, prices):
+        """Set list prices from ``prices`` ({template id: price}) with one UPDATE per chunk.
+
+        Products already at that price are left untouched. The ``[price]``
+        token of ``description_pickingin`` is updated in the same statement, in
+        every language, the way the "Update Inventory Description" automation
+        does for single edits (which this path does not trigger). Used by the
+        ONIX import and the "Update Sales Prices" wizard.
+        Returns the ids of the products whose price changed.
+        """
+        digits = self.env['decimal.precision'].precision_get('Product Price')
+        changed_ids = []
+        for chunk in split_every(REPRICE_CHUNK_SIZE, prices.items()):
+            values = []
+            for tmpl_id, price in chunk:
+                price = float_round(float(price), precision_digits=digits)
+                # str() of the float, as the automation formats product.list_price
+                values.append(SQL('(%s, %s::numeric, %s)', tmpl_id, price, str(price)))
+            self.env.cr.execute(SQL("""
+                UPDATE product_template pt
+                SET list_price = v.price,
+                    description_pickingin = coalesce(
+                        (SELECT jsonb_object_agg(d.key, CASE
+                            WHEN strpos(d.value, '[') > 0 AND strpos(d.value, ']') > 0
+                            THEN left(d.value, strpos(d.value, '[')) || v.token || substr(d.value, strpos(d.value, ']'))
+                            ELSE '[' || v.token || ']'
+                         END)
+                         FROM jsonb_each_text(pt.description_pickingin) d),
+                        jsonb_build_object('en_US', '[' || v.token || ']')
+                    ),
+                    write_uid = %s,
+                    write_date = now() AT TIME ZONE 'UTC'
+                FROM (VALUES %s) AS v(id, price, token)
+                WHERE pt.id = v.id
+                  AND pt.list_price IS DISTINCT FROM v.price
+                RETURNING pt.id
+            """, self.env.uid, SQL(', ').join(values)))
+            ids = [row[0] for row in self.env.cr.fetchall()]
+            if ids:
+                repriced = self.browse(ids)
+                repriced.invalidate_recordset(['list_price', 'description_pickingin', 'write_uid', 'write_date'])
+                repriced.modified(['list_price', 'description_pickingin'])
+                changed_ids += ids
+        return changed_ids
+
+    @api.model_create_multi
+    def create(self, vals_list):
+        vals_list = [self._sync_book_entity_vals(vals) for vals in vals_list]
+        return super().create(vals_list)
+
+    def write(self, vals):
+        author_ids_only = 'x_author_ids' in vals and 'x_author' not in vals
+        vals = self._sync_book_entity_vals(vals)
+        res = super().write(vals)
+        if author_ids_only:
+            # Commands may be relative to the current authors, so read the result back
+            for template in self:
+                super(ProductTemplate, template).write({
+                    'x_author': ', '.join(template.x_author_ids.mapped('name')) or False,
+                })
+        return res
+
+    @api.model
+    def _sync_book_entity_vals(self, vals):
+        """Return a copy of ``vals`` with whichever of the author/publisher string and record is missing."""
+        vals = dict(vals)
+        if 'x_author' in vals and 'x_author_ids' not in vals:
+            authors = self.env['book.author']._resolve(split_authors(vals['x_author']))
+            vals['x_author_ids'] = [Command.set(authors.ids)]
+        elif 'x_author_ids' in vals and 'x_author' not in vals and not self:
+            authors = self.new({'x_author_ids': vals['x_author_ids']}).x_author_ids
+            vals['x_author'] = ', '.join(authors.mapped('name')) or False
+        if 'x_publisher' in vals and 'x_publisher_id' not in vals:
+            vals['x_publisher_id'] = self.env['book.publisher']._resolve(vals['x_publisher']).id
+        elif 'x_publisher_id' in vals and 'x_publisher' not in vals:
+            vals['x_publisher'] = self.env['book.publisher'].browse(vals['x_publisher_id']).name or False
+        return vals
@@ -0,0 +1,7 @@
+from odoo import fields, models
+
+
+class PurchaseOrderLine(models.Model):
+    _inherit = 'purchase.order.line'
+
+    x_isbn = fields.Char(string='ISBN', related='product_id.barcode', store=True, index='btree_not_null')
@@ -0,0 +1,15 @@
+from odoo import models
+
+
+class StockMove(models.Model):
+    _inherit = 'stock.move'
+
+    def _action_done(self, cancel_backorder=False):
+        moves = super()._action_done(cancel_backorder=cancel_backorder)
+        dates = {}
+        for move in moves:
+            if move.state == 'done' and move.picking_type_id.code == 'outgoing':
+                tmpl_id = move.product_id.product_tmpl_id.id
+                dates[tmpl_id] = max(dates.get(tmpl_id, move.date.date()), move.date.date())
+        self.env['product.template']._update_last_sale_date(dates)
+        return moves
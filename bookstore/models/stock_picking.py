@@ -0,0 +1,78 @@
+from odoo import fields, models, _
+from odoo.exceptions import UserError
+
+
+class StockPicking(models.Model):
+    _inherit = 'stock.picking'
+
+    def _update_supplier_info(self):
+        """Make the vendor of these validated receipts the main vendor of their products.
+
+        For every product whose first vendor is another partner, the open
+        vendor lines are closed and a new one is added in front for the
+        receipt's partner, and a manual reordering rule is added if the
+        product has none. Receipts without a purchase order get one, with a
+        line per move of those products, as the receipt automation used to do.
+
+        Sellers and reordering rules of all the products are read at once and
+        the changes are made with one grouped write and one create per model,
+        however many lines the receipts have.
+        """
+        if any(not picking.partner_id for picking in self):
+            raise UserError(_("Please enter a vendor to your transfer."))
+        today = fields.Date.today()
+        products = self.move_ids.product_id
+        # Prefetch sellers and reordering rules of every product in two queries
+        products.seller_ids.mapped('sequence')
+        products.mapped('orderpoint_ids')
+
+        pickings_without_po = self.filtered(lambda p: not p.purchase_id)
+        purchase_orders = dict(zip(pickings_without_po, self.env['purchase.order'].create([
+            {'partner_id': picking.partner_id.id} for picking in pickings_without_po
+        ])))
+
+        sellers_to_close = self.env['product.supplierinfo']
+        seller_vals = []
+        # product -> values of the last vendor line created for it in this batch
+        new_sellers = {}
+        orderpoint_products = self.env['product.product']
+        po_line_vals = []
+        for picking in self:
+            po = purchase_orders.get(picking)
+            moves_by_product = picking.move_ids.grouped('product_id')
+            for product, moves in moves_by_product.items():
+                created = new_sellers.get(product)
+                first_partner_id = created['partner_id'] if created else product.seller_ids[:1].partner_id.id
+                if first_partner_id == picking.partner_id.id:
+                    continue
+                if created:
+                    # Received from another vendor earlier in the same batch
+                    created['date_end'] = today
+                    sequence = created['sequence'] - 1
+                else:
+                    sellers_to_close |= product.seller_ids.filtered(lambda s: not s.date_end)
+                    sequence = (product.seller_ids[:1].sequence or 10) - 1
+                new_sellers[product] = {
+                    'product_id': product.id,
+                    'partner_id': picking.partner_id.id,
+                    'date_start': today,
+                    'sequence': sequence,
+                    'price': product.standard_price,
+                    'delay': 0,
+                    'min_qty': 1,
+                }
+                seller_vals.append(new_sellers[product])
+                if not product.orderpoint_ids:
+                    orderpoint_products |= product
+                if po:
+                    po_line_vals += [{'product_id': product.id, 'order_id': po.id} for _move in moves]
+
+        sellers_to_close.write({'date_end': today})
+        self.env['product.supplierinfo'].create(seller_vals)
+        self.env['stock.warehouse.orderpoint'].create([
+            {'trigger': 'manual', 'product_id': product.id} for product in orderpoint_products
+        ])
+        self.env['purchase.order.line'].create(po_line_vals)
+        for picking, po in purchase_orders.items():
+            po.state = 'purchase'
+            picking.purchase_id = po
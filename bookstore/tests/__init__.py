@@ -0,0 +1 @@
+from . import test_update_supplier_info
@@ -0,0 +1,199 @@
+"""Benchmark of the supplier info update run when a receipt is validated.
+
+Builds large receipts, with some products on several lines, and checks that
+``stock.picking._update_supplier_info`` leaves the same vendors, reordering
+rules and purchase order lines as the receipt server action it replaced,
+in a number of queries that does not grow with the number of lines.
+
+Run it on its own with ``--test-tags /bookstore:supplier_info_benchmark``.
+"""
+import logging
+import time
+
+from odoo import fields
+from odoo.tests import TransactionCase, tagged
+
+_logger = logging.getLogger(__name__)
+
+PRODUCTS = 200
+# The first REPEATED products are on two lines of the receipt
+REPEATED = 100
+# One product in ALREADY_FIRST already has the receipt's vendor first, one in
+# WITH_ORDERPOINT already has a reordering rule
+ALREADY_FIRST = 5
+WITH_ORDERPOINT = 4
+
+# Code of the "Execute Code" receipt server action before it called
+# _update_supplier_info, run as is to compare the results
+OLD_SERVER_ACTION = """
+for picking in records:
+    if not picking.partner_id:
+        raise UserError("Please enter a vendor to your transfer.")
+    po = False
+    if not picking.purchase_id:
+        po = env['purchase.order'].create({
+            'partner_id': picking.partner_id.id,
+        })
+    for move in picking.move_ids:
+        if move.product_id.seller_ids[:1].partner_id == picking.partner_id:
+            continue
+        move.product_id.seller_ids.filtered(lambda s: not s.date_end).write({'date_end': datetime.datetime.today().date()})
+        env['product.supplierinfo'].create({
+            'product_id': move.product_id.id,
+            'partner_id': picking.partner_id.id,
+            'date_start': datetime.datetime.today().date(),
+            'sequence': (move.product_id.seller_ids[:1].sequence or 10) - 1,
+            'price': move.product_id.standard_price,
+            'delay': 0,
+            'min_qty': 1,
+        })
+        if not move.product_id.orderpoint_ids:
+            env['stock.warehouse.orderpoint'].create({
+                'trigger': 'manual',
+                'product_id': move.product_id.id,
+            })
+        if po:
+            env['purchase.order.line'].create({
+                'product_id': move.product_id.id,
+                'order_id': po.id,
+            })
+    if po:
+        po['state'] = 'purchase'
+        picking['purchase_id'] = po.id
+"""
+
+
+@tagged('post_install', '-at_install', 'supplier_info_benchmark')
+class TestUpdateSupplierInfo(TransactionCase):
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.old_vendor = cls.env['res.partner'].create({'name': 'Benchmark Old Vendor'})
+        cls.vendor = cls.env['res.partner'].create({'name': 'Benchmark Vendor'})
+        cls.picking_type = cls.env['stock.warehouse'].search([
+            ('company_id', '=', cls.env.company.id),
+        ], limit=1).in_type_id
+        cls.old_action = cls.env['ir.actions.server'].create({
+            'name': 'Benchmark Old Receipt Action',
+            'model_id': cls.env['ir.model']._get_id('stock.picking'),
+            'state': 'code',
+            'code': OLD_SERVER_ACTION,
+        })
+
+    def _create_products(self, count, prefix):
+        products = self.env['product.product'].create([{
+            'name': f'{prefix} {index}',
+            'type': 'consu',
+            'standard_price': 10.0 + index,
+            'seller_ids': [(0, 0, {
+                'partner_id': (self.vendor if index % ALREADY_FIRST == 0 else self.old_vendor).id,
+                'sequence': 10,
+                'price': 5.0,
+            })],
+        } for index in range(count)])
+        self.env['stock.warehouse.orderpoint'].create([
+            {'trigger': 'manual', 'product_id': product.id}
+            for index, product in enumerate(products) if index % WITH_ORDERPOINT == 0
+        ])
+        return products
+
+    def _create_receipt(self, products, repeated):
+        lines = list(products) + list(products[:repeated])
+        return self.env['stock.picking'].create({
+            'partner_id': self.vendor.id,
+            'picking_type_id': self.picking_type.id,
+            'location_id': self.picking_type.default_location_src_id.id,
+            'location_dest_id': self.picking_type.default_location_dest_id.id,
+            'move_ids': [(0, 0, {
+                'name': product.display_name,
+                'product_id': product.id,
+                'product_uom': product.uom_id.id,
+                'product_uom_qty': 1,
+                'location_id': self.picking_type.default_location_src_id.id,
+                'location_dest_id': self.picking_type.default_location_dest_id.id,
+            }) for product in lines],
+        })
+
+    def _update(self, picking, old=False):
+        """Run the update on ``picking`` and return the number of queries and the time it took."""
+        self.env.flush_all()
+        self.env.invalidate_all()
+        queries = self.env.cr.sql_log_count
+        start = time.monotonic()
+        if old:
+            self.old_action.with_context(active_model='stock.picking', active_ids=picking.ids).run()
+        else:
+            picking._update_supplier_info()
+        self.env.flush_all()
+        return self.env.cr.sql_log_count - queries, time.monotonic() - start
+
+    def _summary(self, picking, products):
+        """Per product: open vendors, whether it has a reordering rule and its PO line count."""
+        self.env.invalidate_all()
+        po_lines = picking.purchase_id.order_line
+        return [(
+            [(seller.partner_id, seller.sequence, seller.price, seller.min_qty, seller.delay)
+             for seller in product.seller_ids if not seller.date_end],
+            bool(product.orderpoint_ids),
+            len(po_lines.filtered(lambda line: line.product_id == product)),
+        ) for product in products]
+
+    def test_matches_old_server_action(self):
+        old_products = self._create_products(PRODUCTS, 'Benchmark Old Book')
+        new_products = self._create_products(PRODUCTS, 'Benchmark New Book')
+        old_receipt = self._create_receipt(old_products, REPEATED)
+        new_receipt = self._create_receipt(new_products, REPEATED)
+
+        old_queries, old_time = self._update(old_receipt, old=True)
+        new_queries, new_time = self._update(new_receipt)
+        _logger.info(
+            "Supplier info update of %s lines: %s queries in %.2fs, server action: %s queries in %.2fs",
+            len(new_receipt.move_ids), new_queries, new_time, old_queries, old_time,
+        )
+
+        self.assertEqual(self._summary(new_receipt, new_products), self._summary(old_receipt, old_products))
+        self.assertEqual(new_receipt.purchase_id.state, 'purchase')
+        self.assertEqual(new_receipt.purchase_id.partner_id, self.vendor)
+        self.assertLess(new_queries * 5, old_queries)
+
+    def test_receipt_with_repeated_products(self):
+        products = self._create_products(PRODUCTS, 'Benchmark Book')
+        receipt = self._create_receipt(products, REPEATED)
+        self._update(receipt)
+
+        today = fields.Date.today()
+        po_lines = receipt.purchase_id.order_line
+        self.assertEqual(receipt.purchase_id.state, 'purchase')
+        for index, product in enumerate(products):
+            sellers = product.seller_ids
+            if index % ALREADY_FIRST == 0:
+                self.assertEqual(len(sellers), 1)
+                self.assertFalse(sellers.date_end)
+                self.assertFalse(po_lines.filtered(lambda line: line.product_id == product))
+                continue
+            self.assertEqual(len(sellers), 2)
+            self.assertEqual(sellers[0].partner_id, self.vendor)
+            self.assertEqual(sellers[0].sequence, 9)
+            self.assertEqual(sellers[0].price, product.standard_price)
+            self.assertEqual(sellers[0].date_start, today)
+            self.assertFalse(sellers[0].date_end)
+            self.assertEqual(sellers[1].partner_id, self.old_vendor)
+            self.assertEqual(sellers[1].date_end, today)
+            self.assertEqual(len(product.orderpoint_ids), 1)
+            # One PO line per receipt line, as the server action did
+            self.assertEqual(
+                len(po_lines.filtered(lambda line: line.product_id == product)),
+                2 if index < REPEATED else 1,
+            )
+
+    def test_query_count_does_not_grow(self):
+        small = self._create_receipt(self._create_products(PRODUCTS // 10, 'Benchmark Small Book'), REPEATED // 10)
+        large = self._create_receipt(self._create_products(PRODUCTS, 'Benchmark Large Book'), REPEATED)
+        small_queries, _small_time = self._update(small)
+        large_queries, large_time = self._update(large)
+        _logger.info(
+            "Supplier info update: %s queries for %s lines, %s queries for %s lines in %.2fs",
+            small_queries, len(small.move_ids), large_queries, len(large.move_ids), large_time,
+        )
+        self.assertLessEqual(large_queries, small_queries * 2)
@@ -0,0 +1,32 @@
+"""ISBN normalization and checksum validation."""
+import re
+
+_SEPARATORS = re.compile(r'[\s-]+')
+
+
+def _isbn13_check_digit(first12):
+    total = sum(int(d) * (3 if i % 2 else 1) for i, d in enumerate(first12))
+    return str((10 - total % 10) % 10)
+
+
+def _isbn10_is_valid(value):
+    total = sum((10 - i) * (10 if d == 'X' else int(d)) for i, d in enumerate(value))
+    return total % 11 == 0
+
+
+def to_isbn13(value):
+    """Return the ISBN-13 of a valid ISBN-10 or ISBN-13, or None.
+
+    Spaces and hyphens are ignored and ISBN-10s are converted; values that
+    are not ISBNs or fail their check digit give None.
+    """
+    value = _SEPARATORS.sub('', value or '').upper()
+    if len(value) == 13:
+        if value.isdigit() and value.startswith(('978', '979')) and _isbn13_check_digit(value[:12]) == value[12]:
+            return value
+        return None
+    if len(value) == 10 and value[:9].isdigit() and (value[9].isdigit() or value[9] == 'X'):
+        if _isbn10_is_valid(value):
+            first12 = '978' + value[:9]
+            return first12 + _isbn13_check_digit(first12)
+    return None
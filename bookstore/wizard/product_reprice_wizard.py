@@ -0,0 +1,49 @@
+from odoo import fields, models, _
+from odoo.exceptions import UserError
+
+
+class ProductRepriceWizard(models.TransientModel):
+    _name = 'bookstore.product.reprice.wizard'
+    _description = 'Update Sales Prices'
+
+    pricelist_id = fields.Many2one(
+        'product.pricelist', string='Pricelist', required=True,
+        help="The sales price of each product is set to its price on this pricelist, e.g. an RRP pricelist, "
+             "converted to the company currency.",
+    )
+    product_tmpl_ids = fields.Many2many('product.template', string='Products', default=lambda self: self._default_products())
+
+    def _default_products(self):
+        if self.env.context.get('active_model') != 'product.template':
+            return False
+        return self.env['product.template'].browse(self.env.context.get('active_ids'))
+
+    def action_reprice(self):
+        """Set the sales prices of the products from the pricelist with one UPDATE per chunk."""
+        self.ensure_one()
+        if not self.product_tmpl_ids:
+            raise UserError(_('Please select the products to reprice.'))
+        self.product_tmpl_ids.check_access('write')
+        pricelist = self.pricelist_id
+        company = self.env.company
+        prices = pricelist._get_products_price(self.product_tmpl_ids, 1.0)
+        if pricelist.currency_id != company.currency_id:
+            # Pricelist prices are in the pricelist currency, list_price in the company's
+            today = fields.Date.context_today(self)
+            prices = {
+                tmpl_id: pricelist.currency_id._convert(price, company.currency_id, company, today)
+                for tmpl_id, price in prices.items()
+            }
+        changed = self.env['product.template']._bulk_reprice(prices)
+        return {
+            'type': 'ir.actions.client',
+            'tag': 'display_notification',
+            'params': {
+                'title': _('Sales Prices Updated'),
+                'message': _('%(changed)s of %(total)s products repriced.',
+                             changed=len(changed), total=len(self.product_tmpl_ids)),
+                'type': 'success',
+                'sticky': False,
+                'next': {'type': 'ir.actions.act_window_close'},
+            },
+        }
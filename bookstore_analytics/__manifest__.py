@@ -0,0 +1,24 @@
+{
+    'name': 'Bookstore Analytics',
+    'version': '1.0.1',
+    'category': 'Inventory',
+    'summary': 'Dead stock, sell-through and weeks of cover from pre-aggregated daily sales',
+    'description': """
+Aggregates POS and website sales per product and day, and takes a nightly
+stock snapshot, so dead-stock and reorder reports over the whole inventory
+read a few small tables instead of the order and stock move history.
+    """,
+    'depends': [
+        'bookstore',
+        'point_of_sale',
+        'website_sale',
+        'stock',
+    ],
+    'data': [
+        'security/ir.model.access.csv',
+        'data/ir_cron.xml',
+        'views/bookstore_stock_report_views.xml',
+    ],
+    'license': 'LGPL-3',
+    'author': 'Harry Bird',
+}
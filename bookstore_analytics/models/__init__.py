@@ -0,0 +1,3 @@
+from . import bookstore_sales_daily
+from . import bookstore_stock_daily
+from . import bookstore_stock_report
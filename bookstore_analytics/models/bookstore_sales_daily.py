@@ -0,0 +1,142 @@
+import logging
+import time
+from datetime import datetime, timedelta
+
+import pytz
+
+from odoo import api, fields, models
+from odoo.tools import SQL
+from odoo.tools.sql import create_index
+
+_logger = logging.getLogger(__name__)
+
+# Days aggregated (and committed) per chunk
+AGGREGATE_CHUNK_DAYS = 31
+# Days before the last aggregated day that are aggregated again on each run,
+# for POS orders synced late and orders confirmed or cancelled after the fact
+REAGGREGATE_DAYS = 7
+# Seconds a single cron run may spend before handing over to the next run
+AGGREGATE_TIME_BUDGET = 240
+AGGREGATED_UNTIL_PARAM = 'bookstore_analytics.sales_aggregated_until'
+
+
+class BookstoreSalesDaily(models.Model):
+    _name = 'bookstore.sales.daily'
+    _description = 'Daily Product Sales'
+    _order = 'date desc, product_id'
+    _log_access = False
+
+    date = fields.Date(string='Date', required=True, readonly=True, index=True)
+    product_id = fields.Many2one('product.product', string='Product', required=True, readonly=True)
+    product_tmpl_id = fields.Many2one('product.template', string='Product Template', readonly=True)
+    channel = fields.Selection([
+        ('pos', 'Point of Sale'),
+        ('website', 'Website'),
+    ], string='Channel', required=True, readonly=True)
+    quantity = fields.Float(string='Quantity Sold', readonly=True, digits='Product Unit of Measure')
+    amount = fields.Float(string='Untaxed Amount', readonly=True)
+
+    def init(self):
+        create_index(
+            self.env.cr, 'bookstore_sales_daily_product_date_index', self._table, ['product_id', 'date'],
+        )
+        # Same partial indexes as bookscan_export, matching the sales predicates below
+        create_index(
+            self.env.cr, 'pos_order_bookscan_date_order_index', 'pos_order', ['date_order'],
+            where="state IN ('paid', 'done')",
+        )
+        create_index(
+            self.env.cr, 'sale_order_bookscan_date_order_index', 'sale_order', ['date_order'],
+            where="state IN ('sale', 'done') AND website_id IS NOT NULL",
+        )
+
+    def _get_tz(self):
+        return self.env.context.get('tz') or self.env.user.tz or 'Pacific/Auckland'
+
+    @api.model
+    def _local_today(self):
+        return datetime.now(pytz.timezone(self._get_tz())).date()
+
+    @api.model
+    def _utc_bounds(self, date_from, date_to):
+        """Naive UTC bounds of the local days ``[date_from, date_to)``."""
+        tz = pytz.timezone(self._get_tz())
+        return tuple(
+            tz.localize(datetime.combine(day, datetime.min.time())).astimezone(pytz.utc).replace(tzinfo=None)
+            for day in (date_from, date_to)
+        )
+
+    @api.model
+    def _cron_aggregate(self):
+        """Scheduled action: aggregate the sales of the days since the last run, then snapshot stock.
+
+        The first run goes back to the first sale, a chunk of days at a time,
+        each chunk committed on its own, and following runs carry on where it
+        stopped. Today is never aggregated: it is picked up, complete, by the
+        next nightly run. Stock is snapshotted every run, so the reports never
+        read a stale stock level.
+        """
+        today = self._local_today()
+        config = self.env['ir.config_parameter'].sudo()
+        until = config.get_param(AGGREGATED_UNTIL_PARAM)
+        if until:
+            day = min(fields.Date.to_date(until), today) - timedelta(days=REAGGREGATE_DAYS)
+        else:
+            day = self._first_sale_date() or today
+        start = time.monotonic()
+        while day < today and time.monotonic() - start < AGGREGATE_TIME_BUDGET:
+            end = min(day + timedelta(days=AGGREGATE_CHUNK_DAYS), today)
+            self._aggregate(day, end)
+            config.set_param(AGGREGATED_UNTIL_PARAM, fields.Date.to_string(end))
+            self.env['ir.cron']._notify_progress(done=(end - day).days, remaining=(today - end).days)
+            self.env.cr.commit()
+            day = end
+        _logger.info("Bookstore analytics: sales aggregated up to %s in %.1fs", day, time.monotonic() - start)
+        self.env['bookstore.stock.daily']._snapshot(today)
+
+    @api.model
+    def _first_sale_date(self):
+        self.env.cr.execute("""
+            SELECT least(
+                (SELECT min(date_order) FROM pos_order WHERE state IN ('paid', 'done')),
+                (SELECT min(date_order) FROM sale_order WHERE state IN ('sale', 'done') AND website_id IS NOT NULL)
+            )
+        """)
+        first = self.env.cr.fetchone()[0]
+        if not first:
+            return None
+        return pytz.utc.localize(first).astimezone(pytz.timezone(self._get_tz())).date()
+
+    @api.model
+    def _aggregate(self, date_from, date_to):
+        """Replace the daily sales of the local days ``[date_from, date_to)`` with fresh totals."""
+        start, end = self._utc_bounds(date_from, date_to)
+        tz = self._get_tz()
+        self.env.cr.execute(
+            "DELETE FROM bookstore_sales_daily WHERE date >= %s AND date < %s", (date_from, date_to),
+        )
+        # Same POS and website sources as the BookScan export
+        self.env.cr.execute(SQL("""
+            INSERT INTO bookstore_sales_daily (date, product_id, product_tmpl_id, channel, quantity, amount)
+            SELECT (po.date_order AT TIME ZONE 'UTC' AT TIME ZONE %(tz)s)::date,
+                   pol.product_id, pp.product_tmpl_id, 'pos', sum(pol.qty), sum(pol.price_subtotal)
+            FROM pos_order_line pol
+            JOIN pos_order po ON po.id = pol.order_id
+            JOIN product_product pp ON pp.id = pol.product_id
+            WHERE po.state IN ('paid', 'done')
+              AND po.date_order >= %(start)s
+              AND po.date_order < %(end)s
+            GROUP BY 1, 2, 3
+            UNION ALL
+            SELECT (so.date_order AT TIME ZONE 'UTC' AT TIME ZONE %(tz)s)::date,
+                   sol.product_id, pp.product_tmpl_id, 'website', sum(sol.product_uom_qty), sum(sol.price_subtotal)
+            FROM sale_order_line sol
+            JOIN sale_order so ON so.id = sol.order_id
+            JOIN product_product pp ON pp.id = sol.product_id
+            WHERE so.state IN ('sale', 'done')
+              AND so.website_id IS NOT NULL
+              AND so.date_order >= %(start)s
+              AND so.date_order < %(end)s
+            GROUP BY 1, 2, 3
+        """, tz=tz, start=start, end=end))
+        self.invalidate_model()
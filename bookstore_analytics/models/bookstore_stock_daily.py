@@ -0,0 +1,36 @@
+from datetime import timedelta
+
+from odoo import api, fields, models
+
+# Days of stock snapshots kept
+SNAPSHOT_RETENTION_DAYS = 400
+
+
+class BookstoreStockDaily(models.Model):
+    _name = 'bookstore.stock.daily'
+    _description = 'Daily Stock Snapshot'
+    _order = 'date desc, product_id'
+    _log_access = False
+
+    date = fields.Date(string='Date', required=True, readonly=True, index=True)
+    product_id = fields.Many2one('product.product', string='Product', required=True, readonly=True)
+    product_tmpl_id = fields.Many2one('product.template', string='Product Template', readonly=True)
+    quantity = fields.Float(string='On Hand', readonly=True, digits='Product Unit of Measure')
+
+    @api.model
+    def _snapshot(self, day):
+        """Record the on-hand quantity of every product in internal locations for ``day``."""
+        cr = self.env.cr
+        cr.execute("DELETE FROM bookstore_stock_daily WHERE date = %s OR date < %s",
+                   (day, day - timedelta(days=SNAPSHOT_RETENTION_DAYS)))
+        cr.execute("""
+            INSERT INTO bookstore_stock_daily (date, product_id, product_tmpl_id, quantity)
+            SELECT %s, sq.product_id, pp.product_tmpl_id, sum(sq.quantity)
+            FROM stock_quant sq
+            JOIN stock_location sl ON sl.id = sq.location_id
+            JOIN product_product pp ON pp.id = sq.product_id
+            WHERE sl.usage = 'internal'
+            GROUP BY sq.product_id, pp.product_tmpl_id
+            HAVING sum(sq.quantity) != 0
+        """, (day,))
+        self.invalidate_model()
@@ -0,0 +1,109 @@
+from odoo import fields, models, tools
+from odoo.tools import SQL
+
+# Sales window of the sell-through rate and weeks of cover
+ANALYSIS_DAYS = 90
+# Products in stock without a sale for this many days are dead stock
+DEAD_STOCK_DAYS = 180
+# Products selling with less than this many weeks of cover left need reordering
+REORDER_WEEKS = 4
+
+
+class BookstoreStockReport(models.Model):
+    _name = 'bookstore.stock.report'
+    _description = 'Stock Sell-Through Analysis'
+    _auto = False
+    _order = 'days_since_last_sale desc, qty_on_hand desc'
+    _rec_name = 'product_id'
+
+    product_id = fields.Many2one('product.product', string='Product', readonly=True)
+    product_tmpl_id = fields.Many2one('product.template', string='Product Template', readonly=True)
+    categ_id = fields.Many2one('product.category', string='Product Category', readonly=True)
+    publisher_id = fields.Many2one('book.publisher', string='Publisher', readonly=True)
+    qty_on_hand = fields.Float(string='On Hand', readonly=True)
+    qty_sold_28 = fields.Float(string='Sold (28 days)', readonly=True)
+    qty_sold = fields.Float(string=f'Sold ({ANALYSIS_DAYS} days)', readonly=True)
+    amount_sold = fields.Float(string=f'Sales ({ANALYSIS_DAYS} days)', readonly=True)
+    last_sale_date = fields.Date(string='Last Sale', readonly=True)
+    days_since_last_sale = fields.Integer(string='Days Since Last Sale', readonly=True, aggregator='avg')
+    sell_through = fields.Float(
+        string='Sell-Through (%)', readonly=True, aggregator='avg',
+        help=f"Units sold in the last {ANALYSIS_DAYS} days over units sold plus units on hand.",
+    )
+    weeks_of_cover = fields.Float(
+        string='Weeks of Cover', readonly=True, aggregator='avg',
+        help=f"Weeks the stock on hand lasts at the average rate of sale of the last {ANALYSIS_DAYS} days.",
+    )
+    is_dead_stock = fields.Boolean(string='Dead Stock', readonly=True)
+    needs_reorder = fields.Boolean(string='Needs Reorder', readonly=True)
+
+    def init(self):
+        # Reads the latest stock snapshot and the daily sales of the window
+        # only, so the whole inventory is answered from small indexed tables.
+        # Sales are aggregated up to the day before the snapshot, so the
+        # windows are the full days [today - n, today).
+        tools.drop_view_if_exists(self.env.cr, self._table)
+        self.env.cr.execute(SQL("""
+            CREATE VIEW %(table)s AS (
+                WITH ref AS (
+                    SELECT coalesce(max(date), current_date) AS today FROM bookstore_stock_daily
+                ),
+                stock AS (
+                    SELECT product_id, quantity
+                    FROM bookstore_stock_daily
+                    WHERE date = (SELECT today FROM ref)
+                ),
+                sales AS (
+                    SELECT product_id,
+                           sum(quantity) FILTER (WHERE date >= (SELECT today FROM ref) - 28) AS qty_28,
+                           sum(quantity) AS qty,
+                           sum(amount) AS amount
+                    FROM bookstore_sales_daily
+                    WHERE date >= (SELECT today FROM ref) - %(days)s
+                    GROUP BY product_id
+                ),
+                figures AS (
+                    SELECT coalesce(stock.product_id, sales.product_id) AS product_id,
+                           coalesce(stock.quantity, 0) AS qty_on_hand,
+                           coalesce(sales.qty_28, 0) AS qty_sold_28,
+                           coalesce(sales.qty, 0) AS qty_sold,
+                           coalesce(sales.amount, 0) AS amount_sold
+                    FROM stock
+                    FULL JOIN sales ON sales.product_id = stock.product_id
+                )
+                -- Last POS or website sale of the variant, from the end of its
+                -- (product_id, date) index entries
+                SELECT f.product_id AS id,
+                       f.product_id,
+                       pp.product_tmpl_id,
+                       pt.categ_id,
+                       pt.x_publisher_id AS publisher_id,
+                       f.qty_on_hand,
+                       f.qty_sold_28,
+                       f.qty_sold,
+                       f.amount_sold,
+                       last.sale_date AS last_sale_date,
+                       (SELECT today FROM ref) - last.sale_date AS days_since_last_sale,
+                       CASE WHEN f.qty_sold + f.qty_on_hand > 0
+                            THEN 100.0 * f.qty_sold / (f.qty_sold + f.qty_on_hand)
+                            ELSE 0 END AS sell_through,
+                       CASE WHEN f.qty_sold > 0
+                            THEN f.qty_on_hand / (f.qty_sold * 7.0 / %(days)s)
+                            END AS weeks_of_cover,
+                       f.qty_on_hand > 0 AND (
+                           last.sale_date IS NULL
+                           OR last.sale_date <= (SELECT today FROM ref) - %(dead_days)s
+                       ) AS is_dead_stock,
+                       f.qty_sold_28 > 0
+                           AND f.qty_on_hand < f.qty_sold * 7.0 / %(days)s * %(reorder_weeks)s AS needs_reorder
+                FROM figures f
+                JOIN product_product pp ON pp.id = f.product_id
+                JOIN product_template pt ON pt.id = pp.product_tmpl_id
+                LEFT JOIN LATERAL (
+                    SELECT max(date) AS sale_date
+                    FROM bookstore_sales_daily
+                    WHERE product_id = f.product_id AND quantity > 0
+                ) last ON true
+            )
+        """, table=SQL.identifier(self._table), days=ANALYSIS_DAYS, dead_days=DEAD_STOCK_DAYS,
+             reorder_weeks=REORDER_WEEKS))
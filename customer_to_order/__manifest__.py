@@ -1,6 +1,6 @@
 {
     'name': 'Customer to Order',
-    'version': '1.2.3',
+    'version': '1.7.1',
     'category': 'Inventory',
     'depends': [
         'bookstore',
@@ -9,7 +9,9 @@
     ],
     'data': [
         'security/ir.model.access.csv',
+        'data/ir_cron.xml',
         'views/customer_order_views.xml',
+        'views/res_config_settings_views.xml',
     ],
     'license': 'LGPL-3',
     'author': 'Harry Bird',
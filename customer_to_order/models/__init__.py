@@ -1 +1,5 @@
 from . import customer_order
+from . import customer_order_arrival
+from . import res_config_settings
+from . import sale_order_line
+from . import stock_move
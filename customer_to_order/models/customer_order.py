@@ -1,5 +1,103 @@
-from odoo import fields, models, tools, _
+import logging
+from collections import defaultdict
+
+from odoo import api, fields, models, tools, Command, _
 from odoo.exceptions import UserError
+from odoo.tools import SQL, str2bool
+from odoo.tools.sql import create_index
+
+_logger = logging.getLogger(__name__)
+
+# Trigger functions recording the products whose customer orders may have
+# changed, and scheduling the cron that recomputes them
+MARK_FUNCTIONS_SQL = """
+    CREATE OR REPLACE FUNCTION customer_order_mark_lines() RETURNS trigger AS $$
+    BEGIN
+        IF TG_OP <> 'INSERT' AND OLD.product_id IS NOT NULL THEN
+            INSERT INTO customer_order_dirty (product_id) VALUES (OLD.product_id);
+        END IF;
+        IF TG_OP <> 'DELETE' AND NEW.product_id IS NOT NULL THEN
+            IF TG_OP = 'INSERT' OR NEW.product_id IS DISTINCT FROM OLD.product_id THEN
+                INSERT INTO customer_order_dirty (product_id) VALUES (NEW.product_id);
+            END IF;
+        END IF;
+        RETURN NULL;
+    END
+    $$ LANGUAGE plpgsql;
+
+    CREATE OR REPLACE FUNCTION customer_order_mark_orders() RETURNS trigger AS $$
+    BEGIN
+        -- TG_ARGV[0] is the order line table
+        EXECUTE format(
+            'INSERT INTO customer_order_dirty (product_id) '
+            'SELECT product_id FROM %I WHERE order_id = $1 AND product_id IS NOT NULL',
+            TG_ARGV[0]
+        ) USING NEW.id;
+        RETURN NULL;
+    END
+    $$ LANGUAGE plpgsql;
+
+    CREATE OR REPLACE FUNCTION customer_order_mark_templates() RETURNS trigger AS $$
+    BEGIN
+        IF TG_OP <> 'INSERT' THEN
+            INSERT INTO customer_order_dirty (product_id)
+            SELECT id FROM product_product WHERE product_tmpl_id = OLD.product_tmpl_id;
+        END IF;
+        IF TG_OP <> 'DELETE' THEN
+            INSERT INTO customer_order_dirty (product_id)
+            SELECT id FROM product_product WHERE product_tmpl_id = NEW.product_tmpl_id;
+        END IF;
+        RETURN NULL;
+    END
+    $$ LANGUAGE plpgsql;
+
+    CREATE OR REPLACE FUNCTION customer_order_schedule_refresh() RETURNS trigger AS $$
+    BEGIN
+        -- Once per transaction: ask for a run of the refresh cron, as ir.cron._trigger() does.
+        -- The cron recomputes the dirty products in its own transaction after this one commits.
+        IF current_setting('customer_order.refresh_scheduled', true) IS DISTINCT FROM '1' THEN
+            PERFORM set_config('customer_order.refresh_scheduled', '1', true);
+            INSERT INTO ir_cron_trigger (cron_id, call_at, create_uid, create_date, write_uid, write_date)
+            SELECT res_id, now() AT TIME ZONE 'UTC', 1, now() AT TIME ZONE 'UTC', 1, now() AT TIME ZONE 'UTC'
+            FROM ir_model_data
+            WHERE module = 'customer_to_order' AND name = 'ir_cron_customer_order_refresh';
+        END IF;
+        RETURN NULL;
+    END
+    $$ LANGUAGE plpgsql;
+"""
+
+# (table, trigger definition) marking products dirty in materialized mode
+MARK_TRIGGERS = [
+    ('sale_order_line', """
+        CREATE TRIGGER %s AFTER INSERT OR DELETE OR UPDATE OF product_id, product_uom_qty, qty_delivered, order_id
+        ON %s FOR EACH ROW EXECUTE FUNCTION customer_order_mark_lines()
+    """),
+    ('purchase_order_line', """
+        CREATE TRIGGER %s AFTER INSERT OR DELETE OR UPDATE OF product_id, product_qty, qty_received, order_id
+        ON %s FOR EACH ROW EXECUTE FUNCTION customer_order_mark_lines()
+    """),
+    ('stock_quant', """
+        CREATE TRIGGER %s AFTER INSERT OR DELETE OR UPDATE OF product_id, quantity, reserved_quantity, location_id
+        ON %s FOR EACH ROW EXECUTE FUNCTION customer_order_mark_lines()
+    """),
+    ('stock_move', """
+        CREATE TRIGGER %s AFTER INSERT OR DELETE OR UPDATE OF product_id, quantity, state
+        ON %s FOR EACH ROW EXECUTE FUNCTION customer_order_mark_lines()
+    """),
+    ('sale_order', """
+        CREATE TRIGGER %s AFTER UPDATE OF state
+        ON %s FOR EACH ROW EXECUTE FUNCTION customer_order_mark_orders('sale_order_line')
+    """),
+    ('purchase_order', """
+        CREATE TRIGGER %s AFTER UPDATE OF state
+        ON %s FOR EACH ROW EXECUTE FUNCTION customer_order_mark_orders('purchase_order_line')
+    """),
+    ('product_supplierinfo', """
+        CREATE TRIGGER %s AFTER INSERT OR DELETE OR UPDATE OF product_tmpl_id, partner_id, sequence, date_start, date_end
+        ON %s FOR EACH ROW EXECUTE FUNCTION customer_order_mark_templates()
+    """),
+]
 
 
 class CustomerOrder(models.Model):
@@ -25,119 +123,195 @@ class CustomerOrder(models.Model):
     ], string='Status', readonly=True)
 
     def init(self):
-        tools.drop_view_if_exists(self.env.cr, self._table)
-        self.env.cr.execute("""
-            CREATE OR REPLACE VIEW %s AS (
+        cr = self.env.cr
+        cr.execute("""
+            CREATE TABLE IF NOT EXISTS customer_order_dirty (product_id integer NOT NULL)
+        """)
+        self._drop_storage()
+        tools.drop_view_if_exists(cr, 'customer_order_live')
+        create_index(cr, 'sale_order_line_customer_order_open_index', 'sale_order_line', ['product_id'],
+                     where='product_uom_qty > COALESCE(qty_delivered, 0)')
+        create_index(cr, 'purchase_order_line_customer_order_open_index', 'purchase_order_line', ['product_id'],
+                     where='qty_received < product_qty')
+        create_index(cr, 'product_supplierinfo_customer_order_index', 'product_supplierinfo',
+                     ['product_tmpl_id', 'sequence', 'id'])
+        cr.execute("""
+            CREATE OR REPLACE VIEW customer_order_live AS (
                 SELECT
                     sol.id AS id,
                     sol.order_id AS sale_order_id,
                     so.partner_id AS partner_id,
                     sol.product_id AS product_id,
                     pp.product_tmpl_id AS product_tmpl_id,
-                    (
-                        SELECT ps.partner_id
-                        FROM product_supplierinfo ps
-                        WHERE ps.product_tmpl_id = pp.product_tmpl_id
-                        AND (ps.date_end IS NULL OR ps.date_end >= CURRENT_DATE)
-                        AND (ps.date_start IS NULL OR ps.date_start <= CURRENT_DATE)
-                        ORDER BY ps.sequence, ps.id
-                        LIMIT 1
-                    ) AS seller_id,
-                    (
-                        SELECT po.id
-                        FROM purchase_order_line pol
-                        JOIN purchase_order po ON po.id = pol.order_id
-                        WHERE pol.product_id = sol.product_id
-                        AND po.state IN ('draft', 'sent', 'to approve', 'purchase')
-                        AND pol.qty_received < pol.product_qty
-                        ORDER BY po.state = 'purchase' DESC, po.id DESC
-                        LIMIT 1
-                    ) AS purchase_order_id,
+                    seller.partner_id AS seller_id,
+                    pur.purchase_order_id AS purchase_order_id,
                     sol.product_uom_qty AS qty_ordered,
                     COALESCE(sol.qty_delivered, 0) AS qty_delivered,
                     (sol.product_uom_qty - COALESCE(sol.qty_delivered, 0)) AS qty_to_deliver,
                     CASE
-                        WHEN COALESCE(sq.free_qty, 0) >= (sol.product_uom_qty - COALESCE(sol.qty_delivered, 0))
+                        WHEN COALESCE(sq.free_qty, 0) + COALESCE(res.reserved_qty, 0)
+                                >= (sol.product_uom_qty - COALESCE(sol.qty_delivered, 0))
                             THEN 'available'
-                        WHEN EXISTS (
-                            SELECT 1
-                            FROM purchase_order_line pol
-                            JOIN purchase_order po ON po.id = pol.order_id
-                            WHERE pol.product_id = sol.product_id
-                            AND po.state = 'purchase'
-                            AND pol.qty_received < pol.product_qty
-                        ) THEN 'on_order'
-                        WHEN EXISTS (
-                            SELECT 1
-                            FROM purchase_order_line pol
-                            JOIN purchase_order po ON po.id = pol.order_id
-                            WHERE pol.product_id = sol.product_id
-                            AND po.state IN ('draft', 'sent', 'to approve')
-                            AND pol.qty_received < pol.product_qty
-                        ) THEN 'in_cart'
+                        WHEN pur.on_order THEN 'on_order'
+                        WHEN pur.in_cart THEN 'in_cart'
                         ELSE 'unordered'
                     END AS status
                 FROM sale_order_line sol
                 JOIN sale_order so ON so.id = sol.order_id
                 JOIN product_product pp ON pp.id = sol.product_id
                 JOIN product_template pt ON pt.id = pp.product_tmpl_id AND pt.type != 'service'
-                LEFT JOIN (
-                    SELECT product_id, SUM(quantity - reserved_quantity) AS free_qty
-                    FROM stock_quant
-                    WHERE location_id IN (
-                        SELECT id FROM stock_location WHERE usage = 'internal'
-                    )
-                    GROUP BY product_id
-                ) sq ON sq.product_id = sol.product_id
+                -- Each lateral subquery runs once per product (memoized by the
+                -- planner) off the partial indexes created below
+                LEFT JOIN LATERAL (
+                    SELECT ps.partner_id
+                    FROM product_supplierinfo ps
+                    WHERE ps.product_tmpl_id = pp.product_tmpl_id
+                    AND (ps.date_end IS NULL OR ps.date_end >= CURRENT_DATE)
+                    AND (ps.date_start IS NULL OR ps.date_start <= CURRENT_DATE)
+                    ORDER BY ps.sequence, ps.id
+                    LIMIT 1
+                ) seller ON TRUE
+                -- Open purchase lines of the product, read once for the PO and both statuses
+                LEFT JOIN LATERAL (
+                    SELECT
+                        bool_or(po.state = 'purchase') AS on_order,
+                        bool_or(po.state != 'purchase') AS in_cart,
+                        (array_agg(po.id ORDER BY po.state = 'purchase' DESC, po.id DESC))[1] AS purchase_order_id
+                    FROM purchase_order_line pol
+                    JOIN purchase_order po ON po.id = pol.order_id
+                    WHERE pol.product_id = sol.product_id
+                    AND pol.qty_received < pol.product_qty
+                    AND po.state IN ('draft', 'sent', 'to approve', 'purchase')
+                ) pur ON TRUE
+                LEFT JOIN LATERAL (
+                    SELECT SUM(q.quantity - q.reserved_quantity) AS free_qty
+                    FROM stock_quant q
+                    JOIN stock_location loc ON loc.id = q.location_id
+                    WHERE q.product_id = sol.product_id
+                    AND loc.usage = 'internal'
+                ) sq ON TRUE
+                -- Stock already reserved for this line, e.g. on arrival of the product
+                LEFT JOIN LATERAL (
+                    SELECT SUM(sm.quantity) AS reserved_qty
+                    FROM stock_move sm
+                    WHERE sm.sale_line_id = sol.id
+                    AND sm.state IN ('assigned', 'partially_available')
+                ) res ON TRUE
                 WHERE sol.product_uom_qty > COALESCE(sol.qty_delivered, 0)
                 AND sol.product_id IS NOT NULL
                 AND so.state = 'sale'
             )
-        """ % self._table)
+        """)
+        cr.execute(MARK_FUNCTIONS_SQL)
+        self._setup_storage()
+
+    # ---- Storage ----
+    #
+    # customer_order_live computes the backlog from the source tables. In the
+    # default mode customer_order is a plain view on it. In materialized mode
+    # customer_order is a table: triggers on the source tables record the
+    # products whose lines may have changed and trigger the refresh cron, which
+    # recomputes only those products in its own transaction once the change is
+    # committed. Reading the list then costs the same whatever the size of the
+    # backlog, and POS, stock and purchase commits never wait on the refresh.
+
+    @api.model
+    def _is_materialized(self):
+        return str2bool(self.env['ir.config_parameter'].sudo().get_param('customer_to_order.materialized', False))
+
+    @api.model
+    def _drop_storage(self):
+        cr = self.env.cr
+        cr.execute("DROP TRIGGER IF EXISTS customer_order_schedule_refresh ON customer_order_dirty")
+        # Refreshed at commit before 1.7.0
+        cr.execute("DROP TRIGGER IF EXISTS customer_order_refresh ON customer_order_dirty")
+        cr.execute("DROP FUNCTION IF EXISTS customer_order_refresh()")
+        for table, _definition in MARK_TRIGGERS:
+            cr.execute(SQL("DROP TRIGGER IF EXISTS %s ON %s",
+                           SQL.identifier(f'customer_order_mark_{table}'), SQL.identifier(table)))
+        cr.execute("SELECT relkind FROM pg_class WHERE relname = %s AND pg_table_is_visible(oid)", [self._table])
+        kind = cr.fetchone()
+        if kind and kind[0] == 'v':
+            tools.drop_view_if_exists(cr, self._table)
+        elif kind:
+            cr.execute(SQL("DROP TABLE %s", SQL.identifier(self._table)))
+
+    @api.model
+    def _setup_storage(self):
+        """Create customer_order as a view or, in materialized mode, as a trigger-maintained table."""
+        cr = self.env.cr
+        self._drop_storage()
+        if not self._is_materialized():
+            cr.execute(SQL("CREATE VIEW %s AS (SELECT * FROM customer_order_live)", SQL.identifier(self._table)))
+            return
+        cr.execute(SQL("""
+            CREATE TABLE %(table)s AS SELECT * FROM customer_order_live WITH NO DATA;
+            ALTER TABLE %(table)s ADD PRIMARY KEY (id);
+            CREATE INDEX customer_order_product_id_index ON %(table)s (product_id);
+            CREATE INDEX customer_order_order_index ON %(table)s (sale_order_id DESC, id DESC);
+            CREATE INDEX customer_order_status_index ON %(table)s (status);
+            CREATE TRIGGER customer_order_schedule_refresh
+                AFTER INSERT ON customer_order_dirty
+                FOR EACH STATEMENT EXECUTE FUNCTION customer_order_schedule_refresh();
+        """, table=SQL.identifier(self._table)))
+        for table, definition in MARK_TRIGGERS:
+            cr.execute(SQL(definition, SQL.identifier(f'customer_order_mark_{table}'), SQL.identifier(table)))
+        self._rebuild()
+
+    @api.model
+    def _rebuild(self):
+        """Recompute the whole materialized backlog. Does nothing in view mode."""
+        if not self._is_materialized():
+            return
+        self.env.flush_all()
+        self.env.cr.execute(SQL("""
+            DELETE FROM customer_order_dirty;
+            TRUNCATE %(table)s;
+            INSERT INTO %(table)s SELECT * FROM customer_order_live;
+        """, table=SQL.identifier(self._table)))
+        self.invalidate_model()
+
+    @api.model
+    def _cron_refresh(self):
+        """Scheduled action: recompute the backlog of the products marked dirty by the triggers.
+
+        Runs in its own transaction, so it reads committed data only. Products
+        marked by transactions committed after this one started stay in the
+        dirty table and are picked up by the next run.
+        """
+        cr = self.env.cr
+        cr.execute("""
+            WITH dirty AS (DELETE FROM customer_order_dirty RETURNING product_id)
+            SELECT array_agg(DISTINCT product_id) FROM dirty
+        """)
+        product_ids = cr.fetchone()[0]
+        if not product_ids or not self._is_materialized():
+            return
+        cr.execute(SQL("""
+            DELETE FROM %(table)s WHERE product_id = ANY(%(ids)s);
+            INSERT INTO %(table)s SELECT * FROM customer_order_live WHERE product_id = ANY(%(ids)s);
+        """, table=SQL.identifier(self._table), ids=product_ids))
+        self.invalidate_model()
+        _logger.info("Customer orders: refreshed the backlog of %s products", len(product_ids))
+
+    @api.model
+    def _cron_rebuild(self):
+        """Scheduled action: full rebuild, picking up vendor validity dates and changes made outside the triggers."""
+        self._rebuild()
 
     def action_create_po(self):
         lines = self.filtered(lambda l: l.status == 'unordered')
         if not lines:
             raise UserError(_("Please select lines with 'Unordered' status."))
 
-        vendor_lines = {}
-        no_vendor = self.env['product.product']
-        for line in lines:
-            if not line.seller_id:
-                no_vendor |= line.product_id
-            else:
-                vendor_lines.setdefault(line.seller_id, self.env['customer.order'])
-                vendor_lines[line.seller_id] |= line
-
+        no_vendor = lines.filtered(lambda l: not l.seller_id).product_id
         if no_vendor:
             raise UserError(_(
                 "The following products have no vendor set:\n%s",
                 '\n'.join(no_vendor.mapped('display_name'))
             ))
 
-        pos = self.env['purchase.order']
-        for vendor, order_lines in vendor_lines.items():
-            po = self.env['purchase.order'].search([
-                ('partner_id', '=', vendor.id),
-                ('state', '=', 'draft'),
-            ], limit=1)
-            if not po:
-                po = self.env['purchase.order'].create({
-                    'partner_id': vendor.id,
-                })
-            for line in order_lines:
-                existing_pol = po.order_line.filtered(
-                    lambda l, p=line.product_id: l.product_id == p
-                )
-                if existing_pol:
-                    existing_pol[0].product_qty += line.qty_to_deliver
-                else:
-                    self.env['purchase.order.line'].create({
-                        'order_id': po.id,
-                        'product_id': line.product_id.id,
-                        'product_qty': line.qty_to_deliver,
-                    })
-            pos |= po
+        pos = lines._create_purchase_orders()
 
         if len(pos) == 1:
             return {
@@ -152,3 +326,52 @@ class CustomerOrder(models.Model):
             'view_mode': 'list,form',
             'domain': [('id', 'in', pos.ids)],
         }
+
+    def _create_purchase_orders(self):
+        """Add these lines to the vendors' draft purchase orders, creating the missing ones.
+
+        Quantities are summed per vendor and product in memory, draft orders
+        are fetched with one search, new lines are created in one batch and
+        existing lines are updated with one write per order.
+        Returns the purchase orders.
+        """
+        quantities = defaultdict(float)
+        for line in self:
+            quantities[line.seller_id, line.product_id] += line.qty_to_deliver
+        vendors = self.seller_id
+
+        PurchaseOrder = self.env['purchase.order']
+        pos_by_vendor = {}
+        for po in PurchaseOrder.search([('partner_id', 'in', vendors.ids), ('state', '=', 'draft')]):
+            pos_by_vendor.setdefault(po.partner_id, po)
+        missing = vendors.filtered(lambda v: v not in pos_by_vendor)
+        for po in PurchaseOrder.create([{'partner_id': vendor.id} for vendor in missing]):
+            pos_by_vendor[po.partner_id] = po
+
+        existing = {}
+        for pol in PurchaseOrder.concat(*pos_by_vendor.values()).order_line:
+            existing.setdefault((pol.order_id, pol.product_id), pol)
+
+        updates = defaultdict(list)
+        new_lines = []
+        for (vendor, product), qty in quantities.items():
+            po = pos_by_vendor[vendor]
+            pol = existing.get((po, product))
+            if pol:
+                updates[po].append(Command.update(pol.id, {'product_qty': pol.product_qty + qty}))
+            else:
+                new_lines.append({'order_id': po.id, 'product_id': product.id, 'product_qty': qty})
+
+        self.env['purchase.order.line'].create(new_lines)
+        for po, commands in updates.items():
+            po.write({'order_line': commands})
+        return PurchaseOrder.concat(*pos_by_vendor.values())
+
+    @api.model
+    def _cron_create_po(self):
+        """Scheduled action: order every unordered backlog line from its vendor."""
+        lines = self.search([('status', '=', 'unordered'), ('seller_id', '!=', False)])
+        if not lines:
+            return
+        pos = lines._create_purchase_orders()
+        _logger.info("Customer orders: %s lines added to %s draft purchase orders", len(lines), len(pos))
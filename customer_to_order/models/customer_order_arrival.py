@@ -0,0 +1,68 @@
+import logging
+
+from odoo import api, fields, models
+
+_logger = logging.getLogger(__name__)
+
+# Arrived products handled per chunk; each chunk is committed on its own
+ARRIVAL_CHUNK_SIZE = 100
+
+
+class CustomerOrderArrival(models.Model):
+    _name = 'customer.order.arrival'
+    _description = 'Customer Order Arrival Queue'
+    _rec_name = 'product_id'
+    _order = 'id'
+
+    product_id = fields.Many2one(
+        'product.product', string='Product', required=True, readonly=True, index=True, ondelete='cascade',
+    )
+    state = fields.Selection([
+        ('pending', 'Pending'),
+        ('done', 'Done'),
+    ], string='Status', default='pending', required=True, readonly=True, index=True)
+    date_done = fields.Datetime(string='Processed On', readonly=True)
+
+    @api.model
+    def _enqueue(self, products):
+        """Queue products that just came into stock, skipping those already pending."""
+        pending = self.search([('product_id', 'in', products.ids), ('state', '=', 'pending')]).product_id
+        to_queue = products - pending
+        if to_queue:
+            self.create([{'product_id': product.id} for product in to_queue])
+            self.env.ref('customer_to_order.ir_cron_customer_order_arrival')._trigger()
+
+    @api.model
+    def _cron_process(self):
+        """Scheduled action: reserve arrived stock for open customer orders and notify them."""
+        done = 0
+        while arrivals := self.search([('state', '=', 'pending')], limit=ARRIVAL_CHUNK_SIZE):
+            arrivals._process()
+            arrivals.write({'state': 'done', 'date_done': fields.Datetime.now()})
+            done += len(arrivals)
+            self.env['ir.cron']._notify_progress(
+                done=done, remaining=self.search_count([('state', '=', 'pending')]),
+            )
+            self.env.cr.commit()
+
+    def _process(self):
+        """Reserve stock for the open sale lines of the arrived products, oldest order first.
+
+        Only the backlog lines of these products are read, so the work
+        follows the receipts, not the size of the backlog. Reservations are
+        made in sale order date order: when an arrival cannot cover every
+        waiting customer, the earliest orders are served first.
+        """
+        backlog = self.env['customer.order'].search([('product_id', 'in', self.product_id.ids)])
+        lines = self.env['sale.order.line'].browse(backlog.ids).filtered(
+            lambda l: not l.x_customer_order_notified
+        ).sorted(lambda l: (l.order_id.date_order, l.id))
+        # _action_assign reserves in recordset order, which follows the sorted lines
+        lines.move_ids.filtered(lambda m: m.state in ('confirmed', 'partially_available'))._action_assign()
+
+        fulfilled = lines.filtered(lambda l: l._customer_order_is_reserved())
+        if fulfilled:
+            fulfilled._customer_order_notify()
+        _logger.info("Customer orders: %s arrived products, %s lines now fulfillable",
+                     len(self.product_id), len(fulfilled))
+
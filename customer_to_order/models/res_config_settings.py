@@ -0,0 +1,24 @@
+from odoo import fields, models
+
+
+class ResConfigSettings(models.TransientModel):
+    _inherit = 'res.config.settings'
+
+    customer_order_materialized = fields.Boolean(
+        string="Materialized Customer Orders",
+        config_parameter='customer_to_order.materialized',
+        help="Keep the Customer Orders backlog in a table updated as orders, purchases and stock change, "
+             "instead of computing it on every load.",
+    )
+    customer_order_notify_customer = fields.Boolean(
+        string="Email Customers on Arrival",
+        config_parameter='customer_to_order.notify_customer',
+        help="When a special order arrives and is reserved, email the customer instead of only logging a note.",
+    )
+
+    def set_values(self):
+        CustomerOrder = self.env['customer.order']
+        was_materialized = CustomerOrder._is_materialized()
+        super().set_values()
+        if CustomerOrder._is_materialized() != was_materialized:
+            CustomerOrder._setup_storage()
@@ -0,0 +1,44 @@
+from collections import defaultdict
+
+from markupsafe import Markup
+
+from odoo import fields, models, _
+from odoo.tools import str2bool
+
+
+class SaleOrderLine(models.Model):
+    _inherit = 'sale.order.line'
+
+    x_customer_order_notified = fields.Boolean(
+        string='Arrival Notified', copy=False,
+        help="Set once the customer and salesperson have been told this special order is in stock.",
+    )
+
+    def _customer_order_is_reserved(self):
+        self.ensure_one()
+        moves = self.move_ids.filtered(lambda m: m.state not in ('done', 'cancel'))
+        return bool(moves) and all(m.state == 'assigned' for m in moves)
+
+    def _customer_order_notify(self):
+        """Tell each sale order, once, which of its special-order lines are now in stock."""
+        notify_customer = str2bool(self.env['ir.config_parameter'].sudo().get_param(
+            'customer_to_order.notify_customer', False,
+        ))
+        lines_by_order = defaultdict(lambda: self.browse())
+        for line in self:
+            lines_by_order[line.order_id] |= line
+        for order, lines in lines_by_order.items():
+            items = Markup('').join(Markup('<li>%s</li>') % name for name in lines.product_id.mapped('display_name'))
+            body = Markup('%s<ul>%s</ul>') % (_("Special order items now in stock and reserved:"), items)
+            if notify_customer:
+                order.message_post(body=body, partner_ids=order.partner_id.ids,
+                                   subtype_xmlid='mail.mt_comment')
+            else:
+                order.message_post(body=body, subtype_xmlid='mail.mt_note')
+            order.activity_schedule(
+                'mail.mail_activity_data_todo',
+                summary=_("Special order ready"),
+                note=body,
+                user_id=order.user_id.id or self.env.uid,
+            )
+        self.x_customer_order_notified = True
@@ -0,0 +1,16 @@
+from odoo import models
+
+
+class StockMove(models.Model):
+    _inherit = 'stock.move'
+
+    def _action_done(self, cancel_backorder=False):
+        moves = super()._action_done(cancel_backorder=cancel_backorder)
+        incoming = moves.filtered(
+            lambda m: m.state == 'done'
+            and m.location_dest_id.usage == 'internal'
+            and m.location_id.usage != 'internal'
+        )
+        if incoming:
+            self.env['customer.order.arrival'].sudo()._enqueue(incoming.product_id)
+        return moves
@@ -0,0 +1 @@
+from . import test_customer_order_plan
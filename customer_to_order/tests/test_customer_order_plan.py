@@ -0,0 +1,154 @@
+"""EXPLAIN regression benchmark of the customer order backlog query.
+
+Generates 100k sale order lines, most of them delivered, and checks that
+the backlog is read off the partial indexes and the per-product LATERAL
+subqueries rather than by scanning the order line tables.
+
+Run it on its own with ``--test-tags /customer_to_order:customer_order_benchmark``.
+"""
+import logging
+import time
+
+from odoo.tests import TransactionCase, tagged
+from odoo.tools import SQL
+
+_logger = logging.getLogger(__name__)
+
+PRODUCTS = 2000
+SALE_ORDERS = 20000
+SALE_LINES = 100000
+PURCHASE_LINES = 20000
+# One sale line in OPEN_SALE_EVERY is still to deliver, one purchase line in
+# OPEN_PURCHASE_EVERY still to receive
+OPEN_SALE_EVERY = 20
+OPEN_PURCHASE_EVERY = 10
+# Tables the backlog must never scan sequentially
+SCANNED_BY_INDEX = ('sale_order_line', 'purchase_order_line')
+
+
+@tagged('post_install', '-at_install', 'customer_order_benchmark')
+class TestCustomerOrderPlan(TransactionCase):
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        customer = cls.env['res.partner'].create({'name': 'Benchmark Customer'})
+        vendor = cls.env['res.partner'].create({'name': 'Benchmark Vendor'})
+        product = cls.env['product.product'].create({
+            'name': 'Benchmark Book',
+            'type': 'consu',
+            'seller_ids': [(0, 0, {'partner_id': vendor.id})],
+        })
+        sale_order = cls.env['sale.order'].create({
+            'partner_id': customer.id,
+            'order_line': [(0, 0, {'product_id': product.id, 'product_uom_qty': 1})],
+        })
+        purchase_order = cls.env['purchase.order'].create({
+            'partner_id': vendor.id,
+            'order_line': [(0, 0, {'product_id': product.id, 'product_qty': 1})],
+        })
+        cls.env.flush_all()
+
+        start = time.monotonic()
+        template_ids = cls._clone('product_template', product.product_tmpl_id.id, PRODUCTS, {
+            'name': SQL("jsonb_build_object('en_US', 'Benchmark Book ' || g)"),
+        })
+        product_ids = cls._clone('product_product', product.id, PRODUCTS, {
+            'product_tmpl_id': SQL("(%s::int[])[g]", template_ids),
+        })
+        cls._clone('product_supplierinfo', product.seller_ids.id, PRODUCTS, {
+            'product_tmpl_id': SQL("(%s::int[])[g]", template_ids),
+        })
+        order_ids = cls._clone('sale_order', sale_order.id, SALE_ORDERS, {
+            'name': SQL("'BENCH/S' || g"),
+            'state': SQL("'sale'"),
+        })
+        cls._clone('sale_order_line', sale_order.order_line.id, SALE_LINES, {
+            'order_id': SQL("(%s::int[])[(g - 1) %% %s + 1]", order_ids, SALE_ORDERS),
+            'product_id': SQL("(%s::int[])[(g - 1) %% %s + 1]", product_ids, PRODUCTS),
+            'qty_delivered': SQL("CASE WHEN g %% %s = 0 THEN 0 ELSE product_uom_qty END", OPEN_SALE_EVERY),
+        })
+        purchase_ids = cls._clone('purchase_order', purchase_order.id, PRODUCTS, {
+            'name': SQL("'BENCH/P' || g"),
+            'state': SQL("CASE WHEN g %% 3 = 0 THEN 'draft' ELSE 'purchase' END"),
+        })
+        cls._clone('purchase_order_line', purchase_order.order_line.id, PURCHASE_LINES, {
+            'order_id': SQL("(%s::int[])[(g - 1) %% %s + 1]", purchase_ids, PRODUCTS),
+            'product_id': SQL("(%s::int[])[(g - 1) %% %s + 1]", product_ids, PRODUCTS),
+            'qty_received': SQL("CASE WHEN g %% %s = 0 THEN 0 ELSE product_qty END", OPEN_PURCHASE_EVERY),
+        })
+        for table in ('product_template', 'product_product', 'product_supplierinfo', 'sale_order',
+                      'sale_order_line', 'purchase_order', 'purchase_order_line'):
+            cls.env.cr.execute(SQL("ANALYZE %s", SQL.identifier(table)))
+        _logger.info("Customer order benchmark: dataset generated in %.1fs", time.monotonic() - start)
+        cls.product_ids = product_ids
+
+    @classmethod
+    def _clone(cls, table, source_id, count, overrides):
+        """Insert ``count`` copies of the row ``source_id`` of ``table`` and return their ids.
+
+        ``overrides`` maps columns to SQL expressions of ``g``, the copy number from 1 to ``count``.
+        """
+        cr = cls.env.cr
+        cr.execute("""
+            SELECT column_name FROM information_schema.columns
+            WHERE table_schema = current_schema() AND table_name = %s AND column_name != 'id'
+            ORDER BY ordinal_position
+        """, [table])
+        columns = [column for column, in cr.fetchall()]
+        cr.execute(SQL(
+            "INSERT INTO %s (%s) SELECT %s FROM %s src, generate_series(1, %s) AS g WHERE src.id = %s RETURNING id",
+            SQL.identifier(table),
+            SQL(', ').join(SQL.identifier(column) for column in columns),
+            SQL(', ').join(overrides.get(column, SQL.identifier('src', column)) for column in columns),
+            SQL.identifier(table), count, source_id,
+        ))
+        return [id_ for id_, in cr.fetchall()]
+
+    def _explain(self, query):
+        """Run ``query`` under EXPLAIN ANALYZE; return its plan nodes and execution time in ms."""
+        self.env.cr.execute(SQL("EXPLAIN (ANALYZE, FORMAT JSON) %s", query))
+        plan = self.env.cr.fetchone()[0][0]
+        nodes = []
+        pending = [plan['Plan']]
+        while pending:
+            node = pending.pop()
+            nodes.append(node)
+            pending += node.get('Plans', [])
+        return nodes, plan['Execution Time']
+
+    def _assert_indexed(self, nodes):
+        for node in nodes:
+            if node.get('Relation Name') in SCANNED_BY_INDEX:
+                self.assertNotEqual(
+                    node['Node Type'], 'Seq Scan', f"{node['Relation Name']} is scanned sequentially",
+                )
+        scanned = {node.get('Relation Name') for node in nodes if 'Scan' in node['Node Type']}
+        for table in SCANNED_BY_INDEX:
+            self.assertIn(table, scanned, f"{table} is not read by the backlog query")
+
+    def test_backlog_plan(self):
+        """The whole backlog: open sale lines off the partial index, purchase state per product."""
+        nodes, duration = self._explain(SQL("SELECT * FROM customer_order_live"))
+        _logger.info("Customer order benchmark: backlog of %s lines in %.1fms",
+                     SALE_LINES // OPEN_SALE_EVERY, duration)
+        self._assert_indexed(nodes)
+        indexes = {node.get('Index Name') for node in nodes}
+        self.assertIn('sale_order_line_customer_order_open_index', indexes)
+        # The purchase lines are aggregated per product in the LATERAL subquery,
+        # looped over its product instead of joined as a whole
+        purchase_loops = [
+            node for node in nodes
+            if node.get('Relation Name') == 'purchase_order_line' and node.get('Actual Loops', 1) > 1
+        ]
+        self.assertTrue(purchase_loops, "purchase_order_line is not read per product")
+        self.env.cr.execute("SELECT count(*) FROM customer_order_live")
+        self.assertEqual(self.env.cr.fetchone()[0], SALE_LINES // OPEN_SALE_EVERY)
+
+    def test_refresh_plan(self):
+        """Refreshing a few products in materialized mode only reads their lines."""
+        nodes, duration = self._explain(SQL(
+            "SELECT * FROM customer_order_live WHERE product_id = ANY(%s)", self.product_ids[:20],
+        ))
+        _logger.info("Customer order benchmark: refresh of 20 products in %.1fms", duration)
+        self._assert_indexed(nodes)
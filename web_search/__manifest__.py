@@ -1,6 +1,6 @@
 {
     'name': 'Web Search',
-    'version': '1.2',
+    'version': '1.8',
     'category': 'Website',
     'depends': [
         'bookstore',
@@ -9,6 +9,7 @@
     'license': 'LGPL-3',
     'author': 'Harry Bird',
     'data': [
+        'security/ir.model.access.csv',
         'views/search_templates.xml',
     ],
 }
@@ -0,0 +1,17 @@
+from odoo import http
+from odoo.http import request
+
+from odoo.addons.web_search.models.web_search_autocomplete import AUTOCOMPLETE_MIN_LENGTH
+
+AUTOCOMPLETE_MAX_LIMIT = 20
+
+
+class WebSearchController(http.Controller):
+
+    @http.route('/web_search/autocomplete', type='json', auth='public', website=True, readonly=True)
+    def autocomplete(self, term='', limit=8):
+        """Search-as-you-type suggestions: ``[{kind, label, url}]`` for titles, authors, publishers and ISBNs."""
+        if not term or len(term.strip()) < AUTOCOMPLETE_MIN_LENGTH:
+            return []
+        limit = max(1, min(int(limit), AUTOCOMPLETE_MAX_LIMIT))
+        return request.env['web.search.autocomplete.key'].sudo()._autocomplete(term, request.website, limit=limit)
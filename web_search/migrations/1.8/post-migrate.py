@@ -0,0 +1,9 @@
+"""x_search_text now holds every translation of the title: recompute it for the whole catalogue."""
+from odoo import api, SUPERUSER_ID
+
+
+def migrate(cr, version):
+    env = api.Environment(cr, SUPERUSER_ID, {})
+    templates = env['product.template'].with_context(active_test=False).search([])
+    env.add_to_compute(templates._fields['x_search_text'], templates)
+    templates._recompute_recordset(['x_search_text'])
@@ -0,0 +1,18 @@
+from odoo import api, models
+
+
+class ProductProduct(models.Model):
+    _inherit = 'product.product'
+
+    @api.model_create_multi
+    def create(self, vals_list):
+        products = super().create(vals_list)
+        if any(vals.get('barcode') for vals in vals_list):
+            self.env['web.search.autocomplete.key']._update_templates(products.product_tmpl_id)
+        return products
+
+    def write(self, vals):
+        res = super().write(vals)
+        if 'barcode' in vals:
+            self.env['web.search.autocomplete.key']._update_templates(self.product_tmpl_id)
+        return res
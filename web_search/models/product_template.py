@@ -1,12 +1,107 @@
-from odoo import api, models
+import re
+import unicodedata
+
+from odoo import api, fields, models
+from odoo.tools import SQL
+
+# Shop orderings under which search results are ranked by relevance instead
+DEFAULT_SEARCH_ORDERS = ('website_sequence', 'name', 'id')
+# website_sale puts published products first whatever the chosen sort
+SHOP_ORDER_PREFIX = 'is_published'
+# website_sale search fields covered by x_search_text; the descriptions are searched as before
+SEARCH_TEXT_FIELDS = {'name', 'default_code', 'product_variant_ids.default_code'}
+# Fields the autocomplete keys are built from, or that decide whether a product gets any
+AUTOCOMPLETE_FIELDS = {
+    'name', 'x_author', 'x_author_ids', 'x_publisher', 'x_publisher_id',
+    'is_published', 'sale_ok', 'active', 'website_id',
+}
+
+
+def normalize_search_text(text):
+    """Lowercase, unaccented, single-spaced form of ``text`` used for search keys."""
+    if not text:
+        return ''
+    text = unicodedata.normalize('NFKD', text).encode('ascii', 'ignore').decode()
+    return re.sub(r'\s+', ' ', text).strip().lower()
 
 
 class ProductTemplate(models.Model):
     _inherit = 'product.template'
 
+    x_search_text = fields.Char(
+        string='Search Text', compute='_compute_x_search_text', store=True, index='trigram',
+        help="Title in every installed language, author, publisher, ISBNs and references in one "
+             "trigram-indexed column for website search.",
+    )
+
+    @api.depends('name', 'default_code', 'x_author', 'x_publisher',
+                 'product_variant_ids.barcode', 'product_variant_ids.x_isbn13', 'product_variant_ids.default_code')
+    def _compute_x_search_text(self):
+        langs = [code for code, _name in self.env['res.lang'].get_installed()]
+        for template in self:
+            # Every translation of the title, as the shop searches it in the visitor's language
+            parts = [template.with_context(lang=lang).name for lang in langs]
+            parts += [template.default_code, template.x_author, template.x_publisher]
+            parts += template.product_variant_ids.mapped('barcode')
+            # The ISBN-13 too, so books with an ISBN-10 or hyphenated barcode are found by it
+            parts += template.product_variant_ids.mapped('x_isbn13')
+            parts += template.product_variant_ids.mapped('default_code')
+            template.x_search_text = normalize_search_text(' '.join(dict.fromkeys(filter(None, parts))))
+
+    @api.model_create_multi
+    def create(self, vals_list):
+        templates = super().create(vals_list)
+        self.env['web.search.autocomplete.key']._update_templates(templates)
+        return templates
+
+    def write(self, vals):
+        res = super().write(vals)
+        if AUTOCOMPLETE_FIELDS.intersection(vals):
+            self.env['web.search.autocomplete.key']._update_templates(self)
+        return res
+
     @api.model
     def _search_get_detail(self, website, order, options):
         result = super()._search_get_detail(website, order, options)
-        result['search_fields'].extend(['x_author', 'x_publisher'])
+        # Every term is matched against the single indexed column instead of
+        # ILIKE scans over the fields it covers
+        result['search_fields'] = ['x_search_text'] + [
+            field for field in result['search_fields'] if field not in SEARCH_TEXT_FIELDS
+        ]
         result['fetch_fields'].extend(['x_author', 'x_publisher'])
         return result
+
+    @api.model
+    def _is_default_search_order(self, order):
+        """Whether ``order`` is the shop's default sort rather than one the visitor picked."""
+        terms = [term.split()[0] for term in (order or '').split(',') if term.strip()]
+        if terms and terms[0] == SHOP_ORDER_PREFIX:
+            terms = terms[1:]
+        return not terms or terms[0] in DEFAULT_SEARCH_ORDERS
+
+    def _search_fetch(self, search_detail, search, limit, order):
+        search_text = search_detail['search_fields'][:1] == ['x_search_text']
+        if search and search_text:
+            # The column is stored unaccented
+            search = normalize_search_text(search)
+        order = search_detail.get('order', order)
+        if (not search or not search_text
+                or not self.env.registry.has_trigram
+                or not self._is_default_search_order(order)):
+            return super()._search_fetch(search_detail, search, limit, order)
+
+        model = self.sudo() if search_detail.get('requires_sudo') else self
+        domain = model._search_build_domain(
+            search_detail['base_domain'], search, search_detail['search_fields'], search_detail.get('search_extra'),
+        )
+        query = model._search(domain, limit=limit)
+        # Best matches first: whole-title hits rank above a word found in a publisher name
+        query.order = SQL(
+            "similarity(%s, %s) DESC, %s",
+            model._field_to_sql(model._table, 'x_search_text'),
+            search,
+            model._order_to_sql(order or model._order, query),
+        )
+        results = model.browse(id_ for id_, in self.env.execute_query(query.select()))
+        count = model.search_count(domain) if limit and limit == len(results) else len(results)
+        return results, count
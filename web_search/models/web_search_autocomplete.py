@@ -0,0 +1,189 @@
+import logging
+import threading
+from collections import OrderedDict
+from urllib.parse import urlencode
+
+from odoo import api, fields, models
+from odoo.tools import SQL
+
+from odoo.addons.web_search.tools.isbn import isbn_prefix
+from .product_template import normalize_search_text
+
+_logger = logging.getLogger(__name__)
+
+AUTOCOMPLETE_MIN_LENGTH = 2
+AUTOCOMPLETE_LRU_SIZE = 4096
+# Leading articles dropped from titles so "hobbit" finds "The Hobbit"
+TITLE_ARTICLES = ('the ', 'a ', 'an ')
+# Bumped on every change to the keys; part of the LRU key so workers drop stale entries
+GENERATION_SEQUENCE = 'web_search_autocomplete_generation'
+
+_lru = OrderedDict()
+_lru_lock = threading.Lock()
+
+
+def _lru_get(key):
+    with _lru_lock:
+        value = _lru.get(key)
+        if value is not None:
+            _lru.move_to_end(key)
+        return value
+
+
+def _lru_put(key, value):
+    with _lru_lock:
+        _lru[key] = value
+        _lru.move_to_end(key)
+        while len(_lru) > AUTOCOMPLETE_LRU_SIZE:
+            _lru.popitem(last=False)
+
+
+class WebSearchAutocompleteKey(models.Model):
+    _name = 'web.search.autocomplete.key'
+    _description = 'Website Autocomplete Key'
+    _rec_name = 'key'
+    _log_access = False
+
+    key = fields.Char(string='Key', required=True, readonly=True)
+    kind = fields.Selection([
+        ('title', 'Title'),
+        ('author', 'Author'),
+        ('publisher', 'Publisher'),
+        ('isbn', 'ISBN'),
+    ], string='Type', required=True, readonly=True)
+    label = fields.Char(string='Label', required=True, readonly=True)
+    product_tmpl_id = fields.Many2one(
+        'product.template', string='Product', required=True, readonly=True, index=True, ondelete='cascade',
+    )
+
+    def init(self):
+        cr = self.env.cr
+        cr.execute(SQL("CREATE SEQUENCE IF NOT EXISTS %s", SQL.identifier(GENERATION_SEQUENCE)))
+        # text_pattern_ops serves "key LIKE 'prefix%'" whatever the database collation
+        cr.execute("""
+            CREATE INDEX IF NOT EXISTS web_search_autocomplete_key_prefix_index
+            ON web_search_autocomplete_key (key text_pattern_ops)
+        """)
+        cr.execute("SELECT 1 FROM web_search_autocomplete_key LIMIT 1")
+        if not cr.rowcount:
+            self._rebuild_all()
+
+    # ---- Keys ----
+
+    @api.model
+    def _template_keys(self, template):
+        """Precomputed (key, kind, label) tuples of a product template."""
+        keys = []
+        title = normalize_search_text(template.name)
+        if title:
+            keys.append((title, 'title', template.name))
+            for article in TITLE_ARTICLES:
+                if title.startswith(article):
+                    keys.append((title[len(article):], 'title', template.name))
+        for kind, value in (('author', template.x_author), ('publisher', template.x_publisher)):
+            key = normalize_search_text(value)
+            if key:
+                keys.append((key, kind, value))
+        for isbn13 in set(filter(None, template.product_variant_ids.mapped('x_isbn13'))):
+            keys.append((isbn13, 'isbn', template.name))
+        return keys
+
+    @api.model
+    def _update_templates(self, templates):
+        """Recompute the keys of ``templates``; unpublished or archived products get none."""
+        if not templates:
+            return
+        self.env.cr.execute("DELETE FROM web_search_autocomplete_key WHERE product_tmpl_id = ANY(%s)",
+                            [templates.ids])
+        rows = [
+            (key, kind, label, template.id)
+            for template in templates.filtered(lambda t: t.active and t.sale_ok and t.is_published)
+            for key, kind, label in self._template_keys(template)
+        ]
+        if rows:
+            self.env.cr.execute(SQL(
+                "INSERT INTO web_search_autocomplete_key (key, kind, label, product_tmpl_id) VALUES %s",
+                SQL(', ').join(SQL('(%s, %s, %s, %s)', *row) for row in rows),
+            ))
+        self._bump_generation()
+
+    @api.model
+    def _rebuild_all(self):
+        Template = self.env['product.template'].with_context(active_test=False)
+        self.env.cr.execute("TRUNCATE web_search_autocomplete_key")
+        ids = Template.search([]).ids
+        for start in range(0, len(ids), 1000):
+            batch = Template.browse(ids[start:start + 1000])
+            self._update_templates(batch)
+            batch.invalidate_recordset()
+        _logger.info("Website autocomplete: indexed %s products", len(ids))
+
+    @api.model
+    def _bump_generation(self):
+        # Once per transaction, however many batches of keys it updates
+        postcommit = self.env.cr.postcommit
+        if postcommit.data.get(GENERATION_SEQUENCE):
+            return
+        postcommit.data[GENERATION_SEQUENCE] = True
+        # Sequences are not transactional: bump again after commit so a worker
+        # reading in between does not keep what it cached from the old data
+        self.env.cr.execute(SQL("SELECT nextval(%s)", GENERATION_SEQUENCE))
+        registry = self.env.registry
+
+        @postcommit.add
+        def bump():
+            with registry.cursor() as cr:
+                cr.execute(SQL("SELECT nextval(%s)", GENERATION_SEQUENCE))
+
+    # ---- Lookup ----
+
+    @api.model
+    def _autocomplete(self, term, website, limit=8):
+        """Suggestions whose title, author, publisher or ISBN starts with ``term``.
+
+        Hot prefixes are answered from an in-process LRU, keyed by the
+        current key generation so any change to the catalogue keys is seen
+        by every worker on its next lookup.
+        """
+        # Digits may start an ISBN as well as a title ("1984", "1Q84"): look up both
+        prefixes = tuple(dict.fromkeys(
+            prefix for prefix in (isbn_prefix(term), normalize_search_text(term))
+            if prefix and len(prefix) >= AUTOCOMPLETE_MIN_LENGTH
+        ))
+        if not prefixes:
+            return []
+        self.env.cr.execute(SQL("SELECT last_value FROM %s", SQL.identifier(GENERATION_SEQUENCE)))
+        generation = self.env.cr.fetchone()[0]
+        cache_key = (self.env.cr.dbname, generation, website.id, prefixes, limit)
+        suggestions = _lru_get(cache_key)
+        if suggestions is None:
+            suggestions = self._lookup(prefixes, website, limit)
+            _lru_put(cache_key, suggestions)
+        return suggestions
+
+    @api.model
+    def _lookup(self, prefixes, website, limit):
+        # normalize_search_text and isbn_prefix leave no LIKE wildcards in the prefixes;
+        # one LIKE per prefix so each is served by the prefix index
+        matches = SQL(' OR ').join(SQL("k.key LIKE %s", prefix + '%') for prefix in prefixes)
+        rows = self.env.execute_query(SQL("""
+            SELECT kind, label, product_tmpl_id
+            FROM (
+                SELECT DISTINCT ON (k.kind, k.label) k.kind, k.label, k.product_tmpl_id, length(k.key) AS key_length
+                FROM web_search_autocomplete_key k
+                JOIN product_template pt ON pt.id = k.product_tmpl_id
+                WHERE (%(matches)s)
+                  AND (pt.website_id IS NULL OR pt.website_id = %(website_id)s)
+                ORDER BY k.kind, k.label, length(k.key), k.product_tmpl_id
+            ) matches
+            ORDER BY key_length, label
+            LIMIT %(limit)s
+        """, matches=matches, website_id=website.id, limit=limit))
+        IrHttp = self.env['ir.http']
+        # Titles and ISBNs open the product, authors and publishers run a shop search
+        return [{
+            'kind': kind,
+            'label': label,
+            'url': (f'/shop/{IrHttp._slug((template_id, label))}' if kind in ('title', 'isbn')
+                    else f'/shop?{urlencode({"search": label})}'),
+        } for kind, label, template_id in rows]
@@ -0,0 +1,24 @@
+"""ISBN-10 / ISBN-13 prefixes for search-as-you-type."""
+import re
+
+from odoo.addons.bookstore.tools.isbn import to_isbn13
+
+_SEPARATORS = re.compile(r'[\s-]+')
+_ISBN_LIKE = re.compile(r'^(97[89])?\d{0,10}[\dX]?$')
+
+
+def isbn_prefix(term):
+    """Map what a customer typed to a prefix of ISBN-13 keys, or None if it is not ISBN-like.
+
+    Complete ISBN-10s are converted, partial ones are looked up under 978.
+    """
+    value = _SEPARATORS.sub('', term or '').upper()
+    if len(value) < 3 or not _ISBN_LIKE.match(value):
+        return None
+    if value.startswith(('978', '979')):
+        return value if value.isdigit() else None
+    isbn13 = to_isbn13(value)
+    if isbn13:
+        return isbn13
+    # Partial ISBN-10: its first nine digits are digits 4-12 of the ISBN-13
+    return '978' + value[:9] if value[:9].isdigit() else None